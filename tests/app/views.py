@@ -10,7 +10,11 @@ def error(request):
 
 
 def first_visit(request):
-    return HttpResponse(request.session.get('first_visit'))
+    return HttpResponse(str(request.first_visit))
+
+
+def no_first_visit(request):
+    return HttpResponse('ok')
 
 
 class TestFeed(SiteFeed):
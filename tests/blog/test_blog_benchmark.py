@@ -0,0 +1,99 @@
+'''
+Blog listing routes query-time benchmark.
+
+Seeds ``WAPPS_BENCHMARK_POSTS`` posts (100k by default) and checks that each listing route
+stays under ``WAPPS_BENCHMARK_BUDGET`` seconds of cumulated query time.
+Only runs when ``WAPPS_BENCHMARK`` is set as seeding is slow:
+
+    WAPPS_BENCHMARK=1 pytest tests/blog/test_blog_benchmark.py
+'''
+import os
+
+from datetime import timedelta
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from wagtail.wagtailcore.models import Page
+
+from wapps.blog.models import BlogPost, BlogPostCategory, BlogPostTag
+from wapps.pagination import make_cursor
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('site'),
+    pytest.mark.skipif(not os.environ.get('WAPPS_BENCHMARK'), reason='Set WAPPS_BENCHMARK to run benchmarks'),
+]
+
+POSTS = int(os.environ.get('WAPPS_BENCHMARK_POSTS', 100000))
+BUDGET = float(os.environ.get('WAPPS_BENCHMARK_BUDGET', 0.1))
+BATCH_SIZE = 100
+
+
+def seed_posts(blog, count, owner, tags, categories):
+    '''Bulk insert posts bypassing treebeard and Wagtail publication'''
+    content_type = ContentType.objects.get_for_model(BlogPost)
+    now = timezone.now()
+    for start in range(0, count, BATCH_SIZE):
+        pages = []
+        for i in range(start, min(start + BATCH_SIZE, count)):
+            slug = 'post-{0}'.format(i)
+            pages.append(Page(
+                title=slug, draft_title=slug, slug=slug, content_type=content_type, live=True, owner=owner,
+                path=Page._get_path(blog.path, blog.depth + 1, i + 1), depth=blog.depth + 1,
+                url_path='{0}{1}/'.format(blog.url_path, slug), first_published_at=now,
+            ))
+        Page.objects.bulk_create(pages)
+    blog.numchild = count
+    blog.save(update_fields=['numchild'])
+
+    ids = Page.objects.filter(content_type=content_type).order_by('path').values_list('pk', flat=True)
+    fields = BlogPost._meta.local_concrete_fields
+    posts, tagged, categorized = [], [], []
+    for i, pk in enumerate(ids):
+        posts.append(BlogPost(page_ptr_id=pk, body='', excerpt='', date=now - timedelta(hours=i)))
+        tagged.append(BlogPostTag(tag=tags[i % len(tags)], content_object_id=pk))
+        categorized.append(BlogPostCategory(category=categories[i % len(categories)], page_id=pk))
+        if len(posts) == BATCH_SIZE:
+            BlogPost.objects._insert(posts, fields=fields, raw=True)
+            posts = []
+    if posts:
+        BlogPost.objects._insert(posts, fields=fields, raw=True)
+    BlogPostTag.objects.bulk_create(tagged, batch_size=BATCH_SIZE)
+    BlogPostCategory.objects.bulk_create(categorized, batch_size=BATCH_SIZE)
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_routes_query_time(client, blog, user_factory, tag_factory, category_factory):
+    user = user_factory(username='author')
+    tags = tag_factory.create_batch(10)
+    categories = category_factory.create_batch(10)
+    seed_posts(blog, POSTS, user, tags, categories)
+    year = (timezone.now() - timedelta(days=30)).year
+
+    routes = (
+        blog.url,
+        blog.url + blog.reverse_subpage('by_date', args=[str(year)]),
+        blog.url + blog.reverse_subpage('by_tag', kwargs={'tag': tags[0].slug}),
+        blog.url + blog.reverse_subpage('by_category', kwargs={'category': categories[0].slug}),
+        blog.url + blog.reverse_subpage('by_author', kwargs={'author': user.username}),
+    )
+
+    # Deep pages must not cost more than the first one
+    deep_cursor = make_cursor(timezone.now() - timedelta(hours=POSTS // 2), 0)
+    timings = {}
+    for url in routes:
+        for page_url in (url, '{0}?after={1}'.format(url, deep_cursor)):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(page_url)
+            assert response.status_code == 200
+            assert page_url != url or len(response.context_data['posts'])
+            elapsed = sum(float(query['time']) for query in ctx.captured_queries)
+            timings[page_url] = elapsed
+
+    over = dict((url, elapsed) for url, elapsed in timings.items() if elapsed > BUDGET)
+    assert not over, 'Routes over the {0}s budget: {1}'.format(BUDGET, over)
@@ -0,0 +1,95 @@
+import pytest
+
+from django.core.management import call_command
+
+from wapps.blog.models import BlogCategoryCount, BlogTagCount
+from wapps.pytest import assert_num_queries
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('site'),
+]
+
+
+def tag_counts(blog):
+    return dict(BlogTagCount.objects.filter(blog=blog).values_list('tag__name', 'count'))
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_counts_updated_on_publication(blog, blog_post_factory, category):
+    post = blog_post_factory(parent=blog, published=True, tags=['a', 'b'], categories=[category])
+    blog_post_factory(parent=blog, published=True, tags=['a'])
+    blog_post_factory(parent=blog, tags=['a', 'draft'])
+
+    assert tag_counts(blog) == {'a': 2, 'b': 1}
+    assert BlogCategoryCount.objects.get(blog=blog, category=category).count == 1
+
+    post.unpublish()
+
+    assert tag_counts(blog) == {'a': 1}
+    assert not BlogCategoryCount.objects.filter(blog=blog).exists()
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_counts_are_scoped_by_blog(blog, blog_factory, blog_post_factory):
+    other = blog_factory(published=True)
+    blog_post_factory(parent=blog, published=True, tags=['a'])
+    blog_post_factory(parent=other, published=True, tags=['a', 'b'])
+
+    assert tag_counts(blog) == {'a': 1}
+    assert tag_counts(other) == {'a': 1, 'b': 1}
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_tags_cloud_is_cached(jinja, wrf, blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True, tags=['a', 'b'])
+    blog_post_factory(parent=blog, published=True, tags=['b'])
+    template = '{% for tag in blog_tags() %}{{ tag.name }}:{{ tag.posts_count }} {% endfor %}'
+
+    assert jinja(template, request=wrf.get('/')) == 'b:2 a:1 '
+
+    request = wrf.get('/')
+    with assert_num_queries(0):
+        jinja(template, request=request)
+
+    blog_post_factory(parent=blog, published=True, tags=['a'])
+    blog_post_factory(parent=blog, published=True, tags=['a'])
+
+    assert jinja(template, request=wrf.get('/')) == 'a:3 b:2 '
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_categories_cloud(jinja, wrf, blog, blog_post_factory, category_factory):
+    used, unused = category_factory.create_batch(2)
+    blog_post_factory(parent=blog, published=True, categories=[used])
+    template = '{% for c in blog_categories() %}{{ c.name }}:{{ c.posts_count }} {% endfor %}'
+
+    rendered = jinja(template, request=wrf.get('/'))
+
+    assert '{0}:1'.format(used.name) in rendered
+    assert '{0}:0'.format(unused.name) in rendered
+
+    used.name = 'renamed'
+    used.save()
+
+    assert 'renamed:1' in jinja(template, request=wrf.get('/'))
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_rebuild_blog_counts(blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True, tags=['a'])
+    BlogTagCount.objects.all().delete()
+
+    call_command('rebuild_blog_counts', stdout=open('/dev/null', 'w'))
+
+    assert tag_counts(blog) == {'a': 1}
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_counts_updated_on_post_deletion(blog, blog_post_factory):
+    post = blog_post_factory(parent=blog, published=True, tags=['a'])
+    blog_post_factory(parent=blog, published=True, tags=['a', 'b'])
+
+    post.delete()
+
+    assert tag_counts(blog) == {'a': 1, 'b': 1}
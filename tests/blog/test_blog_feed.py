@@ -2,6 +2,12 @@ import pytest
 
 import feedparser
 
+from datetime import timedelta
+
+from django.utils import timezone
+
+from wapps.feed import feeds_cache
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize('blog__published', [True])
@@ -12,7 +18,7 @@ def test_minimal_blog_feed(client, site, identity, blog):
     assert response.status_code == 200
     assert response['Content-Type'].split(';', 1)[0] == 'application/atom+xml'
 
-    d = feedparser.parse(response.content)
+    d = feedparser.parse(response.getvalue())
     assert d.feed.title == ' » '.join((identity.name, blog.title))
     assert len(d.entries) == 0
 
@@ -27,7 +33,7 @@ def test_full_blog_feed(client, site, full_identity, blog, blog_post_factory):
     assert response.status_code == 200
     assert response['Content-Type'].split(';', 1)[0] == 'application/atom+xml'
 
-    d = feedparser.parse(response.content)
+    d = feedparser.parse(response.getvalue())
     assert d.feed.title == ' » '.join((full_identity.name, blog.title))
     assert len(d.entries) == len(posts)
 
@@ -42,7 +48,7 @@ def test_full_blog_feed_full_posts(client, site, full_identity, blog, blog_post_
     assert response.status_code == 200
     assert response['Content-Type'].split(';', 1)[0] == 'application/atom+xml'
 
-    d = feedparser.parse(response.content)
+    d = feedparser.parse(response.getvalue())
     assert d.feed.title == ' » '.join((full_identity.name, blog.title))
     assert len(d.entries) == len(posts)
 
@@ -59,6 +65,186 @@ def test_non_published_posts_are_hidden(client, site, identity, blog, blog_post_
     assert response.status_code == 200
     assert response['Content-Type'].split(';', 1)[0] == 'application/atom+xml'
 
-    d = feedparser.parse(response.content)
+    d = feedparser.parse(response.getvalue())
     assert d.feed.title == ' » '.join((identity.name, blog.title))
     assert len(d.entries) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_is_cached(client, site, identity, blog, blog_post_factory):
+    blog_post_factory.create_batch(3, parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('feed')
+    first = client.get(url)
+    body = first.getvalue()
+
+    response = client.get(url)
+
+    assert not response.streaming
+    assert response.content == body
+    assert response['ETag'] == first['ETag']
+    assert response['Last-Modified'] == first['Last-Modified']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_cache_ignores_query_string(client, site, identity, blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('feed')
+    client.get(url).getvalue()
+
+    response = client.get(url, {'utm_source': 'reader'})
+
+    assert not response.streaming
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_not_cached_across_invalidation(client, site, identity, blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('feed')
+    response = client.get(url)
+
+    # Invalidated while the body is being streamed
+    feeds_cache.invalidate(blog.pk)
+    response.getvalue()
+
+    assert client.get(url).streaming
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_conditional_get(client, site, identity, blog, blog_post_factory):
+    blog_post_factory.create_batch(3, parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('feed')
+    response = client.get(url)
+    response.getvalue()
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 304
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_invalidated_on_publish(client, site, identity, blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('feed')
+    response = client.get(url)
+    response.getvalue()
+
+    blog_post_factory(parent=blog, published=True)
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert response.status_code == 200
+    d = feedparser.parse(response.getvalue())
+    assert len(d.entries) == 2
+
+
+def links(d):
+    return {link.rel: link.href for link in d.feed.links}
+
+
+@pytest.fixture
+def paged_posts(settings, blog, blog_post_factory):
+    settings.WAPPS_FEED_LENGTH = 2
+    now = timezone.now()
+    # Newest first
+    return [
+        blog_post_factory(parent=blog, published=True, date=now - timedelta(days=i))
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_archives(client, site, identity, blog, paged_posts):
+    head = feedparser.parse(client.get(blog.url + blog.reverse_subpage('feed')).getvalue())
+
+    # Archives are anchored on the oldest post, the head lists the remaining ones
+    assert [e.link for e in head.entries] == [paged_posts[0].full_url]
+    assert 'next-archive' not in links(head)
+    assert links(head)['prev-archive'].endswith('/feed/archive/2/')
+
+    response = client.get(links(head)['prev-archive'])
+    assert response.status_code == 200
+    assert 'max-age' in response['Cache-Control']
+    newest = feedparser.parse(response.getvalue())
+
+    assert [e.link for e in newest.entries] == [p.full_url for p in paged_posts[1:3]]
+    assert 'fh_archive' in newest.feed
+    assert links(newest)['current'] == links(head)['self']
+    assert 'next-archive' not in links(newest)
+
+    oldest = feedparser.parse(client.get(links(newest)['prev-archive']).getvalue())
+
+    assert [e.link for e in oldest.entries] == [p.full_url for p in paged_posts[3:]]
+    assert links(oldest)['next-archive'] == links(head)['prev-archive']
+    assert 'prev-archive' not in links(oldest)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_archives_survive_publication(client, site, identity, blog, paged_posts, blog_post_factory):
+    url = links(feedparser.parse(client.get(blog.url + blog.reverse_subpage('feed')).getvalue()))['prev-archive']
+    archive = client.get(url).getvalue()
+
+    blog_post_factory(parent=blog, published=True)
+    head = feedparser.parse(client.get(blog.url + blog.reverse_subpage('feed')).getvalue())
+    response = client.get(url)
+
+    assert len(head.entries) == 2
+    assert links(head)['prev-archive'] == url
+    assert not response.streaming
+    assert response.content == archive
+
+    paged_posts[3].unpublish()
+    response = client.get(url)
+
+    assert response.streaming
+    assert len(feedparser.parse(response.getvalue()).entries) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_new_archive(client, site, identity, blog, paged_posts, blog_post_factory):
+    feed_url = blog.url + blog.reverse_subpage('feed')
+    oldest_url = blog.url + blog.reverse_subpage('feed_archive', kwargs={'number': 1})
+    newest_url = links(feedparser.parse(client.get(feed_url).getvalue()))['prev-archive']
+    oldest = client.get(oldest_url).getvalue()
+    client.get(newest_url).getvalue()
+
+    # The head is full, the next publication moves it to a new archive
+    blog_post_factory(parent=blog, published=True)
+    blog_post_factory(parent=blog, published=True)
+    head = feedparser.parse(client.get(feed_url).getvalue())
+
+    assert len(head.entries) == 1
+    assert links(head)['prev-archive'].endswith('/feed/archive/3/')
+    response = client.get(oldest_url)
+    assert not response.streaming
+    assert response.content == oldest
+    newest = feedparser.parse(client.get(newest_url).getvalue())
+    assert links(newest)['next-archive'] == links(head)['prev-archive']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+@pytest.mark.parametrize('number', [0, 3])
+def test_blog_feed_unknown_archive(client, site, identity, blog, paged_posts, number):
+    response = client.get(blog.url + blog.reverse_subpage('feed_archive', kwargs={'number': number}))
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_feed_archives_invalidated_by_backdated_post(client, site, identity, blog, paged_posts, blog_post_factory):
+    url = blog.url + blog.reverse_subpage('feed_archive', kwargs={'number': 1})
+    client.get(url).getvalue()
+
+    backdated = blog_post_factory(parent=blog, published=True, date=paged_posts[-1].date - timedelta(days=1))
+    response = client.get(url)
+
+    assert response.streaming
+    entries = feedparser.parse(response.getvalue()).entries
+    assert entries[-1].link == backdated.full_url
@@ -1,5 +1,6 @@
 import pytest
 
+from django.core.management import call_command
 from pytest_factoryboy import LazyFixture
 
 from wapps.blog.models import Blog, BlogPost
@@ -27,3 +28,34 @@ def test_blogpost_hierarchy_restrictions(blog_post, site):
 def test_blogpost_parent_blog(blog, blog_post):
     assert isinstance(blog_post.blog, Blog)
     assert blog_post.blog == blog
+
+
+@pytest.mark.django_db
+def test_blogpost_text_fields_computed_on_publication(blog, blog_post_factory):
+    body = '<p>{0}</p>'.format(' '.join(['word'] * 450))
+    post = blog_post_factory(parent=blog, body=body, excerpt='', search_description='')
+
+    assert post.word_count == 0
+
+    post.save_revision().publish()
+    post = BlogPost.objects.get(pk=post.pk)
+
+    assert post.plain_text == ' '.join(['word'] * 450)
+    assert post.word_count == 450
+    assert post.reading_time == 3
+    assert len(post.summary) == 255
+    assert len(post.short_summary) == 140
+    assert post.summarize(140) == post.short_summary
+
+
+@pytest.mark.django_db
+def test_backfill_blog_text(blog, blog_post_factory):
+    post = blog_post_factory(parent=blog, body='<p>Some <b>rich</b> text</p>', excerpt='An excerpt')
+
+    call_command('backfill_blog_text', stdout=open('/dev/null', 'w'))
+    post.refresh_from_db()
+
+    assert post.plain_text == 'Some rich text'
+    assert post.word_count == 3
+    assert post.reading_time == 1
+    assert post.summary == post.short_summary == 'An excerpt'
@@ -1,5 +1,8 @@
 import pytest
 
+from wapps.blog.utils import get_blog_context
+from wapps.pytest import assert_num_queries
+
 pytestmark = [
     pytest.mark.django_db,
     pytest.mark.usefixtures('site'),
@@ -23,3 +26,25 @@ def test_blog_url(jinja, wrf, blog):
 
 def test_blog_url_no_blog(jinja, wrf):
     assert jinja('{{ blog_url("by_tag", tag="tag") }}', request=wrf.get('/')) == 'None'
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_helpers_share_a_request_context(jinja, wrf, blog, blog_post_factory):
+    blog_post_factory(parent=blog, published=True, tags=['tag'])
+    template = ''.join((
+        '{{ blog_feed_url() }}',
+        '{{ blog_url("by_tag", tag="tag") }}',
+        '{% for tag in blog_tags() %}{{ tag }}{% endfor %}',
+        '{% for category in blog_categories() %}{{ category }}{% endfor %}',
+        '{% for post in blog_latest_posts() %}{{ post.title }}{% endfor %}',
+        '{% for post in blog_latest_posts() %}{{ post.title }}{% endfor %}',
+        '{{ blog_url("by_tag", tag="tag") }}',
+    ))
+    jinja(template, request=wrf.get('/'))  # Warm up shared caches
+
+    request = wrf.get('/')
+    with assert_num_queries(1):  # Latest posts are fetched once
+        jinja(template, request=request)
+
+    assert get_blog_context(request).blog == blog
+    assert get_blog_context(request) is get_blog_context(request)
@@ -2,6 +2,7 @@ import factory
 import pytest
 
 from wapps.blog import utils
+from wapps.pytest import assert_num_queries
 
 
 @pytest.mark.django_db
@@ -21,3 +22,45 @@ def test_get_blog_from_context(wrf, site, blog_factory):
 
     ctx = {'request': wrf.get('/')}
     assert utils.get_blog_from_context(ctx) == blog
+
+
+@pytest.mark.django_db
+def test_get_site_blogs_is_cached(rf, site, blog_factory):
+    blogs = [blog_factory(parent=site.root_page, published=True) for _ in range(2)]
+    blog_factory(parent=site.root_page)
+
+    assert utils.get_site_blogs(site) == tuple(blogs)
+
+    request = rf.get('/')
+    with assert_num_queries(0):
+        assert utils.get_site_blogs(site, request) == tuple(blogs)
+        assert utils.get_site_blog(site, request) == blogs[0]
+
+
+@pytest.mark.django_db
+def test_get_site_blogs_invalidation(site, blog_factory, page_factory):
+    blog = blog_factory(parent=site.root_page, published=True)
+    other = blog_factory(parent=site.root_page, published=True)
+    section = page_factory(parent=site.root_page, published=True)
+
+    assert utils.get_site_blogs(site) == (blog, other)
+
+    other.unpublish()
+    assert utils.get_site_blogs(site) == (blog,)
+
+    blog.move(section, pos='last-child')
+    assert utils.get_site_blogs(site)[0].url_path.startswith(section.url_path)
+
+    blog.delete()
+    assert utils.get_site_blogs(site) == ()
+
+
+@pytest.mark.django_db
+def test_get_site_blog_nested_site(site, site_factory, blog_factory, page_factory):
+    nested_root = page_factory(parent=site.root_page, published=True)
+    nested = site_factory(hostname='nested.com', root_page=nested_root)
+    nested_blog = blog_factory(parent=nested_root, published=True)
+    blog = blog_factory(parent=site.root_page, published=True)
+
+    assert utils.get_site_blogs(site) == (blog,)
+    assert utils.get_site_blogs(nested) == (nested_blog,)
@@ -1,7 +1,12 @@
 import pytest
 
+from datetime import datetime, timedelta
+
+from django.utils import timezone
 from pytest_factoryboy import LazyFixture
 
+from wapps.pagination import make_cursor
+
 pytestmark = [
     pytest.mark.django_db,
     pytest.mark.usefixtures('site'),
@@ -80,6 +85,72 @@ def test_blog_with_posts_by_tag(client, blog, blog_post_factory):
         assert post not in ctx['posts']
 
 
+@pytest.fixture
+def paged_posts(monkeypatch, blog, blog_post_factory):
+    monkeypatch.setattr('wapps.blog.models.DEFAULT_PAGE_SIZE', 2)
+    now = timezone.now()
+    # Newest first
+    return [
+        blog_post_factory(parent=blog, published=True, tags=['test'], date=now - timedelta(days=i))
+        for i in range(5)
+    ]
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_keyset_pagination(client, blog, paged_posts):
+    response = client.get(blog.url)
+    posts = response.context_data['posts']
+
+    assert list(posts) == paged_posts[:2]
+    assert not posts.has_previous()
+    assert posts.next_cursor == make_cursor(paged_posts[1].date, paged_posts[1].pk)
+
+    posts = client.get(blog.url, {'after': posts.next_cursor}).context_data['posts']
+    assert list(posts) == paged_posts[2:4]
+    middle = posts
+
+    posts = client.get(blog.url, {'after': posts.next_cursor}).context_data['posts']
+    assert list(posts) == paged_posts[4:]
+    assert not posts.has_next()
+
+    posts = client.get(blog.url, {'before': posts.previous_cursor}).context_data['posts']
+    assert list(posts) == paged_posts[2:4]
+    assert posts.next_cursor == middle.next_cursor
+
+    posts = client.get(blog.url, {'before': posts.previous_cursor}).context_data['posts']
+    assert list(posts) == paged_posts[:2]
+    assert not posts.has_previous()
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_keyset_pagination_by_tag(client, blog, paged_posts, blog_post_factory):
+    blog_post_factory(parent=blog, published=True)
+    url = blog.url + blog.reverse_subpage('by_tag', kwargs={'tag': 'test'})
+
+    posts = client.get(url).context_data['posts']
+    posts = client.get(url, {'after': posts.next_cursor}).context_data['posts']
+
+    assert list(posts) == paged_posts[2:4]
+    assert posts.count == len(paged_posts)
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_posts_count_is_cached(client, blog, paged_posts, blog_post_factory):
+    assert client.get(blog.url).context_data['posts'].count == 5
+
+    blog_post_factory(parent=blog, published=True).save_revision().publish()
+
+    assert client.get(blog.url).context_data['posts'].count == 6
+
+
+@pytest.mark.parametrize('blog__published', [True])
+@pytest.mark.parametrize('cursor', ['nope', '1-2-3', '99999999999999999999999999-1'])
+def test_blog_invalid_page_cursor(client, blog, cursor):
+    response = client.get(blog.url, {'after': cursor})
+
+    assert response.status_code == 404
+
+
 @pytest.mark.parametrize('blog_post__published', [True])
 @pytest.mark.parametrize('blog_post__parent', [LazyFixture('blog')])
 def test_minimal_blog_post_page(client, blog_post):
@@ -95,3 +166,55 @@ def test_full_blog_post_page(client, blog, blog_post_factory):
 
     assert response.status_code == 200
     assert response.context_data['page'] == post
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_posts_by_date(client, blog, blog_post_factory):
+    tz = timezone.get_current_timezone()
+    dates = [datetime(2017, 1, 31, 23, 59), datetime(2017, 2, 1), datetime(2017, 2, 2), datetime(2016, 12, 31, 23, 59)]
+    posts = [blog_post_factory(parent=blog, published=True, date=timezone.make_aware(d, tz)) for d in dates]
+
+    def listed(**kwargs):
+        url = blog.url + blog.reverse_subpage('by_date', args=kwargs.values())
+        return set(client.get(url).context_data['posts'])
+
+    assert listed(year='2017') == set(posts[:3])
+    assert listed(year='2017', month='02') == set(posts[1:3])
+    assert listed(year='2017', month='01') == set(posts[:1])
+    assert listed(year='2017', month='02', day='01') == set(posts[1:2])
+    assert listed(year='2016', month='12') == set(posts[3:])
+
+
+@pytest.mark.parametrize('blog__published', [True])
+@pytest.mark.parametrize('path', ['2017/13/', '2017/02/30/', '2017/00/'])
+def test_blog_posts_by_invalid_date(client, blog, path):
+    response = client.get(blog.url + path)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_page_cache_purged_on_post_publication(client, settings, blog, blog_post_factory):
+    settings.WAPPS_PAGE_CACHE = True
+    post = blog_post_factory(parent=blog, published=True)
+    client.get(blog.url)
+    client.get(post.url)
+
+    assert 'blog-{0}'.format(blog.pk) in client.get(post.url)['Surrogate-Key'].split()
+
+    blog_post_factory(parent=blog, published=True)
+
+    assert client.get(blog.url)['X-Page-Cache'] == 'miss'
+    assert client.get(post.url)['X-Page-Cache'] == 'miss'
+
+
+@pytest.mark.parametrize('blog__published', [True])
+def test_blog_post_preview_summary_is_not_stale(wrf, identity, blog, blog_post_factory):
+    post = blog_post_factory(parent=blog, published=True, excerpt='Published excerpt')
+    post.excerpt = 'Edited excerpt'
+
+    response = post.serve_preview(wrf.get(post.url), post.default_preview_mode)
+    content = response.render().content.decode('utf8')
+
+    assert 'Edited excerpt' in content
+    assert 'Published excerpt' not in content
@@ -1,5 +1,8 @@
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from wapps import jsonld
 
 
@@ -43,3 +46,62 @@ def test_full_gallery_with_albums(wrf, site, identity, gallery_factory, album_fa
     assert len(graph['hasPart']) == len(albums)
     for part in graph['hasPart']:
         assert part['@type'] == 'ImageGallery'
+
+
+@pytest.mark.django_db
+def test_album_associated_media(wrf, site, identity, tag, album_factory, image_factory):
+    images = image_factory.create_batch(3, tags=[tag])
+    image_factory.create_batch(2)
+    album = album_factory(full=True, published=True, tags=[tag])
+    data = jsonld.graph({'request': wrf.get('/')}, album)
+
+    graph = jsonld.extract_first(data['@graph'], 'ImageGallery')
+    assert graph['image'].endswith(album.image.get_rendition('original').url)
+    assert len(graph['associatedMedia']) == len(images)
+
+
+@pytest.mark.django_db
+def test_manual_album_associated_media_ordered(wrf, site, identity, manual_album_factory):
+    album = manual_album_factory(published=True, images=3)
+    data = jsonld.graph({'request': wrf.get('/')}, album)
+
+    graph = jsonld.extract_first(data['@graph'], 'ImageGallery')
+    names = [media['name'] for media in graph['associatedMedia']]
+    assert names == [i.image.title for i in album.images.all()]
+
+
+@pytest.mark.django_db
+def test_album_associated_media_limit(wrf, site, identity, tag, album_factory, image_factory, settings):
+    settings.WAPPS_GALLERY_JSONLD_MEDIA_LIMIT = 2
+    image_factory.create_batch(3, tags=[tag])
+    album = album_factory(published=True, tags=[tag])
+    data = jsonld.graph({'request': wrf.get('/')}, album)
+
+    graph = jsonld.extract_first(data['@graph'], 'ImageGallery')
+    assert len(graph['associatedMedia']) == 2
+
+
+@pytest.mark.django_db
+def test_gallery_jsonld_constant_queries(wrf, site, identity, tag_factory, gallery_factory, album_factory,
+                                         manual_album_factory, image_factory):
+    gallery = gallery_factory(published=True)
+
+    def count_queries():
+        context = {'request': wrf.get('/')}
+        gallery.__jsonld__(context)  # Ensure renditions are created
+        with CaptureQueriesContext(connection) as ctx:
+            gallery.__jsonld__(context)
+        return len(ctx.captured_queries)
+
+    def add_albums():
+        tag = tag_factory()
+        image_factory.create_batch(2, tags=[tag])
+        album_factory(full=True, published=True, parent=gallery, tags=[tag])
+        manual_album_factory(full=True, published=True, parent=gallery, images=2)
+
+    add_albums()
+    expected = count_queries()
+    add_albums()
+    add_albums()
+
+    assert count_queries() == expected
@@ -0,0 +1,81 @@
+import pytest
+
+from django.core.management import call_command
+
+from wapps.gallery import membership
+from wapps.gallery.models import AlbumMembership, AlbumTag
+
+pytestmark = pytest.mark.django_db
+
+
+def images_of(album):
+    return list(album.get_images(None))
+
+
+def test_membership_created_from_album_tags(tag, album_factory, image_factory):
+    images = image_factory.create_batch(3, tags=[tag])
+    image_factory.create_batch(2)
+    album = album_factory(published=True, tags=[tag])
+
+    assert images_of(album) == sorted(images, key=lambda i: i.pk)
+
+
+def test_membership_updated_on_image_tags_change(tag, album_factory, image_factory):
+    album = album_factory(published=True, tags=[tag])
+    image = image_factory()
+    assert images_of(album) == []
+
+    image.tags.add(tag)
+    assert images_of(album) == [image]
+
+    image.tags.remove(tag)
+    assert images_of(album) == []
+
+
+def test_membership_updated_on_album_tags_change(tag_factory, album_factory, image_factory):
+    first, second = tag_factory.create_batch(2)
+    image = image_factory(tags=[second])
+    album = album_factory(published=True, tags=[first])
+    assert images_of(album) == []
+
+    album.tags.add(second)
+    album.save()
+    assert images_of(album) == [image]
+
+    AlbumTag.objects.filter(content_object=album, tag=second).delete()
+    assert images_of(album) == []
+
+
+def test_membership_no_duplicates(tag_factory, album_factory, image_factory):
+    tags = tag_factory.create_batch(2)
+    image = image_factory(tags=tags)
+    album = album_factory(published=True, tags=tags)
+
+    assert images_of(album) == [image]
+
+
+def test_manual_albums_have_no_membership(tag, manual_album_factory, image_factory):
+    image_factory(tags=[tag])
+    manual_album_factory(published=True, tags=[tag], images=2)
+
+    assert not AlbumMembership.objects.exists()
+
+
+def test_rebuild_repairs_drift(tag, album_factory, image_factory):
+    images = image_factory.create_batch(3, tags=[tag])
+    album = album_factory(published=True, tags=[tag])
+    AlbumMembership.objects.filter(image=images[0]).delete()
+    AlbumMembership.objects.create(album=album, image=image_factory())
+
+    assert membership.rebuild() == 3
+    assert images_of(album) == sorted(images, key=lambda i: i.pk)
+
+
+def test_rebuild_command(tag, album_factory, image_factory):
+    image_factory.create_batch(2, tags=[tag])
+    album_factory(published=True, tags=[tag])
+    AlbumMembership.objects.all().delete()
+
+    call_command('rebuild_album_images', stdout=open('/dev/null', 'w'))
+
+    assert AlbumMembership.objects.count() == 2
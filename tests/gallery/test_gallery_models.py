@@ -2,7 +2,9 @@ import pytest
 
 from pytest_factoryboy import LazyFixture
 
-from wapps.gallery.models import Gallery
+from wapps import renditions
+from wapps.gallery.models import Gallery, ManualAlbum
+from wapps.pytest import assert_num_queries
 
 
 @pytest.mark.django_db
@@ -15,3 +17,24 @@ def test_album_parent_gallery(gallery, album):
 @pytest.mark.django_db
 def test_root_album_has_no_parent_gallery(album):
     assert album.gallery is None
+
+
+@pytest.mark.django_db
+def test_album_images_are_prewarmed(tag, image_factory, album_factory):
+    images = image_factory.create_batch(2, tags=[tag])
+    album = album_factory(published=True, tags=[tag], image=image_factory())
+
+    with assert_num_queries(1):
+        assert renditions.page_images_ids(album) == set([album.image_id] + [i.pk for i in images])
+
+
+@pytest.mark.django_db
+def test_manual_album_images_are_prewarmed(manual_album_factory):
+    album = manual_album_factory(published=True, images=2)
+    album.save()
+    album = ManualAlbum.objects.get(pk=album.pk)
+
+    with assert_num_queries(1):
+        ids = renditions.page_images_ids(album)
+    assert ids == set(album.images.values_list('image_id', flat=True))
+    assert len(ids) == 2
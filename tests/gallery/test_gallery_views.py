@@ -2,6 +2,8 @@ import pytest
 
 from pytest_factoryboy import LazyFixture
 
+from wapps.gallery.models import DEFAULT_PAGE_SIZE
+
 pytestmark = [
     pytest.mark.django_db,
     pytest.mark.usefixtures('site'),
@@ -71,3 +73,65 @@ def test_full_manual_album_page(client, tag, manual_album_factory):
     assert response.status_code == 200
     assert response.context_data['page'] == album
     assert len(response.context_data['images']) == 3
+
+
+def test_album_page_is_paginated(client, tag, album_factory, image_factory):
+    images = image_factory.create_batch(DEFAULT_PAGE_SIZE + 2, tags=[tag])
+    album = album_factory(full=True, published=True, tags=[tag])
+
+    response = client.get(album.url)
+    assert response.status_code == 200
+    page = response.context_data['images']
+    assert len(page) == DEFAULT_PAGE_SIZE
+    assert page.has_next()
+
+    response = client.get(album.url, {'page': 2})
+    assert response.status_code == 200
+    assert [i.pk for i in response.context_data['images']] == [i.pk for i in images[DEFAULT_PAGE_SIZE:]]
+
+
+def test_manual_album_page_is_paginated(client, manual_album_factory):
+    album = manual_album_factory(full=True, published=True, images=DEFAULT_PAGE_SIZE + 1)
+    expected = [i.image.pk for i in album.images.all()]
+
+    response = client.get(album.url, {'page': 2})
+
+    assert response.status_code == 200
+    assert [i.pk for i in response.context_data['images']] == expected[DEFAULT_PAGE_SIZE:]
+
+
+def test_album_images_json(client, tag, album_factory, image_factory):
+    images = image_factory.create_batch(DEFAULT_PAGE_SIZE + 1, tags=[tag])
+    album = album_factory(full=True, published=True, tags=[tag])
+    url = album.url + album.reverse_subpage('images_json')
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['page'] == 1
+    assert data['count'] == len(images)
+    assert len(data['images']) == DEFAULT_PAGE_SIZE
+    assert data['images'][0]['id'] == images[0].pk
+    assert data['next'] == url + '?page=2'
+
+    data = client.get(data['next']).json()
+
+    assert data['page'] == 2
+    assert [i['id'] for i in data['images']] == [images[-1].pk]
+    assert data['next'] is None
+
+
+def test_album_page_cache_purged_on_images_changes(client, settings, identity, tag, album_factory, image_factory):
+    settings.WAPPS_PAGE_CACHE = True
+    image = image_factory(tags=[tag])
+    album = album_factory(published=True, tags=[tag])
+    client.get(album.url)
+    assert client.get(album.url)['X-Page-Cache'] == 'hit'
+
+    image.title = 'Changed'
+    image.save()
+    assert client.get(album.url)['X-Page-Cache'] == 'miss'
+
+    image_factory(tags=[tag])
+    assert client.get(album.url)['X-Page-Cache'] == 'miss'
@@ -81,6 +81,7 @@ INSTALLED_APPS = [
 # }
 
 MIDDLEWARE = [
+    'wapps.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
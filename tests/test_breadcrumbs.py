@@ -0,0 +1,82 @@
+import pytest
+
+from wapps import jsonld
+from wapps.breadcrumbs import ancestors_paths, get_breadcrumbs
+from wapps.pytest import assert_num_queries
+
+pytestmark = pytest.mark.django_db
+
+
+def test_ancestors_paths():
+    assert ancestors_paths('0001') == []
+    assert ancestors_paths('000100020003') == ['00010002']
+    assert ancestors_paths('0001000200030004') == ['00010002', '000100020003']
+
+
+def test_breadcrumbs(site, page_factory):
+    parent = page_factory(parent=site.root_page, published=True)
+    child = page_factory(parent=parent, published=True)
+    page = page_factory(parent=child, published=True)
+
+    crumbs = get_breadcrumbs(page, site)
+
+    expected = [p for p in page.get_ancestors(inclusive=True) if not p.is_root()]
+    assert [c.path for c in crumbs] == [p.path for p in expected]
+    for crumb, p in zip(crumbs, expected):
+        assert crumb.title == p.title
+        assert crumb.url == p.relative_url(site)
+        assert crumb.full_url == p.full_url
+        assert crumb.depth == p.depth
+
+
+def test_breadcrumbs_single_query_then_cached(site, page_factory):
+    parent = page_factory(parent=site.root_page, published=True)
+    child = page_factory(parent=parent, published=True)
+    page = page_factory(parent=child, published=True)
+    site.get_site_root_paths()
+
+    with assert_num_queries(1):
+        get_breadcrumbs(page, site)
+    with assert_num_queries(0):
+        get_breadcrumbs(page, site)
+
+
+def test_breadcrumbs_invalidated_on_publish(site, page_factory):
+    parent = page_factory(parent=site.root_page, published=True)
+    page = page_factory(parent=parent, published=True)
+    get_breadcrumbs(page, site)
+
+    parent.title = 'New title'
+    parent.save_revision().publish()
+
+    assert get_breadcrumbs(page, site)[-2].title == 'New title'
+
+
+def test_breadcrumbs_for_unsaved_page(site, page_factory):
+    page = page_factory.build()
+
+    crumbs = get_breadcrumbs(page, site)
+
+    assert len(crumbs) == 1
+    assert crumbs[0].title == page.title
+    assert crumbs[0].url is None
+
+
+def test_jsonld_breadcrumb(wrf, site, page_factory):
+    parent = page_factory(parent=site.root_page, published=True)
+    page = page_factory(parent=parent, published=True)
+
+    data = jsonld.breadcrumb({'request': wrf.get('/'), 'page': page})
+
+    assert data['@type'] == 'BreadcrumbList'
+    assert [e['position'] for e in data['itemListElement']] == [1, 2]
+    assert [e['item']['@id'] for e in data['itemListElement']] == [parent.full_url, page.full_url]
+
+
+def test_breadcrumbs_template_global(jinja, site, page_factory, wrf):
+    parent = page_factory(parent=site.root_page, published=True)
+    page = page_factory(parent=parent, published=True)
+
+    out = jinja('{% for crumb in breadcrumbs() %}{{ crumb.title }}/{% endfor %}', request=wrf.get('/'), page=page)
+
+    assert out == '{0}/{1}/'.format(parent.title, page.title)
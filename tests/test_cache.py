@@ -0,0 +1,80 @@
+from wapps.cache import LRUCache, VersionedCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+
+    assert 'a' in lru
+    assert 'b' not in lru
+    assert 'c' in lru
+    assert len(lru) == 2
+
+
+def test_versioned_cache_get_or_set():
+    cache = VersionedCache('test-get-or-set')
+    calls = []
+
+    def build():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_set('key', build) == 'value'
+    assert cache.get_or_set('key', build) == 'value'
+    assert len(calls) == 1
+
+
+def test_versioned_cache_shared_between_processes():
+    cache = VersionedCache('test-shared')
+    cache.set('key', 'value')
+    # Simulate another process with an empty local cache
+    cache.clear()
+
+    assert cache.get('key') == 'value'
+
+
+def test_versioned_cache_invalidate_scope():
+    cache = VersionedCache('test-scope')
+    cache.set('key', 'first', scope=1)
+    cache.set('key', 'second', scope=2)
+
+    cache.invalidate(1)
+
+    assert cache.get('key', scope=1) is None
+    assert cache.get('key', scope=2) == 'second'
+
+
+def test_versioned_cache_invalidate_namespace():
+    cache = VersionedCache('test-namespace')
+    cache.set('key', 'first', scope=1)
+    cache.set('key', 'second')
+
+    cache.invalidate()
+
+    assert cache.get('key', scope=1) is None
+    assert cache.get('key') is None
+
+
+def test_versioned_cache_evicted_version_does_not_revive_values():
+    cache = VersionedCache('test-evicted')
+    cache.set('key', 'first')
+    cache.invalidate()
+    cache.set('key', 'second')
+    cache.invalidate()
+    # The version is evicted from the shared cache
+    cache.backend.delete(cache.version_key())
+    cache.clear()
+
+    assert cache.get('key') is None
+
+
+def test_versioned_cache_scopes_versions():
+    cache = VersionedCache('test-scopes')
+    first, second = cache.scopes_versions(['a', 'b'])
+
+    cache.invalidate('a')
+
+    assert cache.scopes_versions(['a', 'b']) == [first + 1, second]
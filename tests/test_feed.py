@@ -43,3 +43,15 @@ def test_full_site_feed(client, site, full_identity, page_factory, settings, fak
     assert 'webfeeds_cover' in d.feed
     assert 'webfeeds_logo' in d.feed
     assert 'webfeeds_icon' in d.feed
+
+
+def test_extended_atom_feed_stream():
+    feed = ExtendedAtomFeed(title='title', link='http://localhost/', description='description')
+    for i in range(3):
+        feed.add_item(title='item {0}'.format(i), link='http://localhost/{0}'.format(i), description='',
+                      content='<p>content</p>')
+
+    chunks = list(feed.stream())
+
+    assert len(chunks) == 5
+    assert b''.join(chunks) == feed.writeString('utf-8').encode('utf-8')
@@ -0,0 +1,89 @@
+import pytest
+
+from wapps.identity import FAVICON_SIZES, get_identity
+from wapps.pytest import assert_num_queries, render_jinja_template
+from wapps.utils import get_image_url
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def visual_identity(identity, image_factory):
+    identity.logo = image_factory()
+    identity.favicon = image_factory()
+    identity.twitter = 'wapps'
+    identity.email = 'contact@wapps.io'
+    identity.save()
+    identity.tags.add('tag-1', 'tag-2')
+    return identity
+
+
+def test_snapshot(site, visual_identity):
+    snapshot = get_identity(site)
+
+    assert snapshot.name == visual_identity.name
+    assert snapshot.description == visual_identity.description
+    assert snapshot.twitter == visual_identity.twitter
+    assert snapshot.email == visual_identity.email
+    assert snapshot.logo == visual_identity.logo
+    assert snapshot.tags == tuple(t.name for t in visual_identity.tags.all())
+    assert snapshot.logo_url == site.root_url + get_image_url(visual_identity.logo, 'original')
+    assert snapshot.svg_logo_url is None
+    assert snapshot.same_as == ('https://twitter.com/wapps', 'mailto:contact@wapps.io')
+
+
+def test_snapshot_is_immutable(site, identity):
+    with pytest.raises(AttributeError):
+        get_identity(site).name = 'Altered'
+
+
+def test_favicon_urls(site, visual_identity):
+    snapshot = get_identity(site)
+
+    for width, height in FAVICON_SIZES:
+        assert snapshot.favicon_url(width, height) == visual_identity.favicon_url(width, height)
+    assert snapshot.favicon_url(42) == visual_identity.favicon_url(42)
+
+
+def test_snapshot_is_cached(site, identity):
+    get_identity(site)
+
+    with assert_num_queries(0):
+        get_identity(site)
+
+
+def test_invalidated_on_save(site, identity):
+    get_identity(site)
+    identity.name = 'New name'
+    identity.save()
+
+    assert get_identity(site).name == 'New name'
+
+
+def test_invalidated_on_tags_change(site, identity):
+    get_identity(site)
+    identity.tags.add('new-tag')
+
+    assert 'new-tag' in get_identity(site).tags
+
+
+def test_invalidated_on_image_change(site, identity, image):
+    identity.logo = image
+    identity.save()
+    get_identity(site)
+
+    image.title = 'New title'
+    image.save()
+    assert get_identity(site).logo.title == 'New title'
+
+    image.delete()
+    assert get_identity(site).logo is None
+
+
+def test_metadata_head_is_query_free(site, visual_identity, wrf):
+    render_jinja_template('{% include "wapps/metadata.html" %}', request=wrf.get('/'))
+    request = wrf.get('/')
+
+    with assert_num_queries(0):
+        out = render_jinja_template('{% include "wapps/metadata.html" %}', request=request)
+    assert get_identity(site).favicon_url(57) in out
@@ -0,0 +1,125 @@
+import pytest
+
+from django.core.management import call_command
+
+from wapps.social import http, instagram
+from wapps.templatetags.social import instagram_feed
+
+
+def item(id):
+    return {
+        'id': str(id),
+        'images': dict((name, {'url': 'http://cdn/{0}/{1}.jpg'.format(name, id)})
+                       for name in instagram.IMAGE_SIZES.values()),
+        'caption': {'text': 'caption {0}'.format(id)},
+        'link': 'http://instagram/{0}'.format(id),
+        'likes': {'count': id},
+        'comments': {'count': id},
+        'location': None,
+        'created_time': '1500000000',
+    }
+
+
+@pytest.fixture
+def upstream(settings, fake_server):
+    '''A local fake Instagram serving the same items for any user'''
+    fake_server.json({'items': [item(i) for i in range(3)]})
+    settings.WAPPS_INSTAGRAM_URL = fake_server.url + '{user}/media/'
+    settings.WAPPS_INSTAGRAM_TIMEOUT = (1, 1)
+    settings.WAPPS_HTTP_RETRIES = 0
+    http.reset()
+    yield fake_server
+    http.reset()
+
+
+@pytest.fixture
+def sync_executor(monkeypatch):
+    '''Run background refreshes synchronously'''
+    class Executor(object):
+        def submit(self, func, *args):
+            return func(*args)
+    monkeypatch.setattr(instagram, '_executor', Executor())
+
+
+def test_cold_miss_is_fetched_in_background(upstream, monkeypatch):
+    submitted = []
+
+    class Executor(object):
+        def submit(self, func, *args):
+            submitted.append((func, args))
+    monkeypatch.setattr(instagram, '_executor', Executor())
+
+    feed = instagram_feed('user')
+
+    assert feed[0]['id'] == 'unknown'
+    assert upstream.hits == 0
+    assert submitted == [(instagram.refresh, ('user', True))]
+
+
+def test_cold_miss_snapshot_is_served_once_fetched(upstream, sync_executor):
+    assert instagram_feed('user')[0]['id'] == 'unknown'
+    assert upstream.hits == 1
+
+    feed = instagram_feed('user', 'low', 2)
+
+    assert [i['id'] for i in feed] == ['0', '1']
+    assert feed[0]['src'] == 'http://cdn/low_resolution/0.jpg'
+    assert upstream.hits == 1
+
+
+def test_cold_miss_is_single_flight(upstream, sync_executor):
+    instagram.acquire('user')
+
+    feed = instagram_feed('user')
+
+    assert upstream.hits == 0
+    assert feed[0]['id'] == 'unknown'
+
+
+def test_stale_snapshot_is_served_and_refreshed(upstream, settings, sync_executor):
+    instagram.refresh('user')
+    upstream.json({'items': [item(42)]})
+    settings.WAPPS_INSTAGRAM_REFRESH = -1
+
+    assert instagram.get_snapshot('user')['items'][0]['id'] == '0'
+    assert upstream.hits == 2
+    assert instagram.get_snapshot('user')['items'][0]['id'] == '42'
+
+
+def test_stale_refresh_is_single_flight(upstream, settings, sync_executor):
+    instagram.refresh('user')
+    settings.WAPPS_INSTAGRAM_REFRESH = -1
+    instagram.acquire('user')
+
+    instagram.get_snapshot('user')
+
+    assert upstream.hits == 1
+
+
+@pytest.mark.parametrize('status', [404, 500])
+def test_upstream_errors_keep_last_good_snapshot(upstream, status):
+    instagram.refresh('user')
+    upstream.status = status
+
+    snapshot = instagram.refresh('user')
+
+    assert snapshot['items'][0]['id'] == '0'
+    assert snapshot['checked'] > snapshot['updated']
+    assert not instagram.is_stale(snapshot)
+
+
+def test_read_timeout(upstream, settings):
+    settings.WAPPS_INSTAGRAM_TIMEOUT = (1, 0.1)
+    upstream.delay = 0.5
+
+    with pytest.raises(instagram.FetchError):
+        instagram.fetch('user')
+
+
+@pytest.mark.django_db
+def test_refresh_instagram_command(upstream, capsys):
+    call_command('refresh_instagram', 'user')
+
+    out, _ = capsys.readouterr()
+    assert 'user: 3 items' in out
+    assert instagram.get_snapshot('user')['items']
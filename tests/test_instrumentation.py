@@ -0,0 +1,130 @@
+import logging
+
+import pytest
+
+from pytest_factoryboy import register
+
+from wapps import instrumentation
+from wapps.blog.factories import BlogFactory
+
+register(BlogFactory)
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.WAPPS_INSTRUMENTATION = True
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+@instrumentation.timed('tests.double')
+def double(value):
+    return value * 2
+
+
+def test_timed_is_transparent_when_disabled():
+    assert double(2) == 4
+    assert instrumentation.current() is None
+
+
+def test_timed_counts_calls():
+    timings = instrumentation.start()
+    try:
+        double(1)
+        double(2)
+    finally:
+        instrumentation.stop()
+
+    calls, duration = timings.metrics['tests.double']
+    assert calls == 2
+    assert duration >= 0
+    assert instrumentation.current() is None
+
+
+@pytest.mark.django_db
+def test_renditions_are_timed(image):
+    timings = instrumentation.start()
+    try:
+        image.get_rendition('fill-10x10')
+    finally:
+        instrumentation.stop()
+
+    assert timings.metrics['renditions.get'][0] == 1
+
+
+def test_server_timing_header():
+    timings = instrumentation.Timings()
+    timings.add('jsonld.graph', 0.0012)
+    timings.add('jsonld.graph', 0.0008)
+
+    assert timings.header(0.01) == 'jsonld.graph;dur=2.00;desc="2 calls", total;dur=10.00'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('site')
+def test_disabled_by_default(client, blog_factory):
+    page = blog_factory(published=True)
+
+    response = client.get(page.url)
+
+    assert 'Server-Timing' not in response
+    assert client.get('/instrumentation/').status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('site', 'instrumented')
+def test_instrumented_request(admin_client, blog_factory, caplog):
+    page = blog_factory(published=True)
+
+    with caplog.at_level(logging.INFO, logger='wapps.instrumentation'):
+        response = admin_client.get(page.url)
+
+    metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+    assert 'jsonld.graph' in metrics
+    assert 'identity' in metrics
+    assert metrics[-1] == 'total'
+    record = caplog.records[-1]
+    assert 'path={0}'.format(page.url) in record.getMessage()
+    assert 'jsonld.graph' in record.timings
+    assert instrumentation.get_stats()['total']['calls'] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('site', 'instrumented')
+def test_server_timing_is_hidden_from_visitors(client, settings, blog_factory):
+    page = blog_factory(published=True)
+
+    assert 'Server-Timing' not in client.get(page.url)
+
+    settings.DEBUG = True
+
+    assert 'Server-Timing' in client.get(page.url)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('site', 'instrumented')
+def test_stats_view(client, admin_client, blog_factory):
+    page = blog_factory(published=True)
+    client.get(page.url)
+
+    assert client.get('/instrumentation/').status_code == 403
+
+    stats = admin_client.get('/instrumentation/').json()
+    assert stats['jsonld.graph']['calls'] == 1
+    assert stats['total']['calls'] >= 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('site', 'identity', 'instrumented')
+def test_streamed_feed_rendering_is_timed(client, blog_factory, caplog):
+    blog = blog_factory(published=True)
+
+    with caplog.at_level(logging.INFO, logger='wapps.instrumentation'):
+        response = client.get(blog.url + blog.reverse_subpage('feed'))
+        assert response.streaming
+        assert not caplog.records
+        response.getvalue()
+
+    assert 'feed.render' in caplog.records[-1].timings
+    assert instrumentation.get_stats()['feed.render']['calls'] == 1
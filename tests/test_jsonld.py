@@ -1,6 +1,7 @@
 import pytest
 
 from wapps import jsonld
+from wapps.pytest import assert_num_queries
 
 
 @pytest.mark.django_db
@@ -91,3 +92,45 @@ def test_faq_static_page(wrf, site, identity, static_page):
     assert graph['@id'] == static_page.full_url
     assert graph['url'] == static_page.full_url
     assert graph['name'] == static_page.seo_title
+
+
+@pytest.mark.django_db
+def test_site_fragments_are_cached(wrf, site, identity):
+    request = wrf.get('/')
+    jsonld.graph({'request': request})
+
+    with assert_num_queries(0):
+        jsonld.graph({'request': request})
+
+
+@pytest.mark.django_db
+def test_site_fragments_invalidated_on_identity_save(wrf, site, identity):
+    request = wrf.get('/')
+    jsonld.graph({'request': request})
+
+    identity.name = 'New name'
+    identity.save()
+
+    data = jsonld.graph({'request': request})
+    org_graph = jsonld.extract_first(data['@graph'], 'Organization')
+    assert org_graph['name'] == 'New name'
+
+
+@pytest.mark.django_db
+def test_site_navigation_invalidated_on_publish(wrf, site, identity, page_factory):
+    request = wrf.get('/')
+    assert len(jsonld.extract(jsonld.graph({'request': request})['@graph'], 'SiteNavigationElement')) == 0
+
+    page = page_factory(parent=site.root_page, show_in_menus=True)
+    page.save_revision().publish()
+
+    data = jsonld.graph({'request': request})
+    assert len(jsonld.extract(data['@graph'], 'SiteNavigationElement')) == 1
+
+
+@pytest.mark.django_db
+def test_cached_organization_is_not_shared(wrf, site, identity):
+    context = {'request': wrf.get('/')}
+    jsonld.organization(context)['name'] = 'Altered'
+
+    assert jsonld.organization(context)['name'] == identity.name
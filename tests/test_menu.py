@@ -0,0 +1,85 @@
+import pytest
+
+from wapps import menu
+from wapps.pytest import assert_num_queries
+
+pytestmark = pytest.mark.django_db
+
+
+def test_menu_items(site, page_factory, site_factory):
+    visible = page_factory(parent=site.root_page, show_in_menus=True, published=True)
+    child = page_factory(parent=visible, show_in_menus=True, published=True)
+    page_factory(parent=site.root_page, show_in_menus=False, published=True)
+    page_factory(parent=child, show_in_menus=True, published=True)  # Too deep
+    other_root = page_factory(parent=site.root_page, published=True)
+    site_factory(hostname='other.com', root_page=other_root, is_default_site=False)
+    other = page_factory(parent=other_root, show_in_menus=True, published=True)
+
+    items = menu.get_menu(site)
+
+    assert [i.path for i in items] == sorted([visible.path, child.path, other.path])
+    by_path = dict((i.path, i) for i in items)
+    for page in visible, child, other:
+        item = by_path[page.path]
+        assert item.title == page.title
+        assert item.url == page.relative_url(site)
+        assert item.full_url == page.full_url
+        assert item.depth == page.depth
+    assert by_path[other.path].url.startswith('http://other.com')
+
+
+def test_menu_items_children(site, page_factory):
+    parent = page_factory(parent=site.root_page, show_in_menus=True, published=True)
+    while parent.depth < menu.MAX_DEPTH:
+        parent = page_factory(parent=parent, show_in_menus=True, published=True)
+    first = page_factory(parent=parent, show_in_menus=True, published=True, seo_title='SEO')
+    second = page_factory(parent=parent, show_in_menus=True, published=True)
+    page_factory(parent=parent, show_in_menus=False, published=True)
+
+    item = dict((i.pk, i) for i in menu.get_menu(site))[parent.pk]
+
+    assert [c.pk for c in item.children] == [first.pk, second.pk]
+    assert item.children[0].seo_title == 'SEO'
+    assert item.children[0].url == first.relative_url(site)
+    assert first.pk not in [i.pk for i in menu.get_menu(site)]
+
+
+def test_menu_is_cached(site, page_factory):
+    page_factory(parent=site.root_page, show_in_menus=True, published=True)
+    expected = menu.get_menu(site)
+
+    with assert_num_queries(0):
+        assert menu.get_menu(site) == expected
+
+
+def test_menu_invalidated_on_publish(site, page_factory):
+    assert menu.get_menu(site) == ()
+
+    page = page_factory(parent=site.root_page, show_in_menus=True)
+    page.save_revision().publish()
+
+    assert [i.title for i in menu.get_menu(site)] == [page.title]
+
+
+def test_menu_invalidated_on_unpublish(site, page_factory):
+    page = page_factory(parent=site.root_page, show_in_menus=True, published=True)
+    assert len(menu.get_menu(site)) == 1
+
+    page.unpublish()
+
+    assert menu.get_menu(site) == ()
+
+
+def test_menu_items_template_global(jinja, site, page_factory, wrf):
+    page = page_factory(parent=site.root_page, show_in_menus=True, published=True)
+
+    out = jinja('{% for item in menu_items() %}<a href="{{ item.url }}">{{ item.title }}</a>{% endfor %}',
+                request=wrf.get('/'))
+
+    assert out == '<a href="{0}">{1}</a>'.format(page.relative_url(site), page.title)
+
+
+def test_menu_template_global_returns_pages(jinja, site, page_factory):
+    page = page_factory(parent=site.root_page, show_in_menus=True, published=True)
+
+    assert jinja('{% for item in menu() %}{{ item.pk }}{% endfor %}') == str(page.pk)
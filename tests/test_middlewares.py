@@ -1,5 +1,15 @@
 import pytest
 
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.functional import empty
+
+from wapps.middleware import AdminLocaleMiddleware, PathMatcher
+
+
+def french(request):
+    return 'fr'
+
 
 @pytest.mark.django_db
 def test_http_response_error_middleware(client):
@@ -9,13 +19,33 @@ def test_http_response_error_middleware(client):
 
 
 @pytest.mark.django_db
-def test_first_visit_middleware(client):
+def test_first_visit_middleware(client, settings):
     # First visit
-    assert client.get('/first-visit/').content == b'True'
-    assert client.session['visited'] is True
+    response = client.get('/first-visit/')
+    assert response.content == b'True'
+    assert settings.WAPPS_FIRST_VISIT_COOKIE in response.cookies
+    assert 'Cookie' in response['Vary']
     # Second visit
-    assert client.get('/first-visit/').content == b'False'
-    assert client.session['visited'] is True
+    response = client.get('/first-visit/')
+    assert response.content == b'False'
+    assert settings.WAPPS_FIRST_VISIT_COOKIE not in response.cookies
+    assert 'sessionid' not in client.cookies
+
+
+@pytest.mark.django_db
+def test_first_visit_middleware_tampered_cookie(client, settings):
+    client.cookies[settings.WAPPS_FIRST_VISIT_COOKIE] = '1'
+
+    assert client.get('/first-visit/').content == b'True'
+
+
+@pytest.mark.django_db
+def test_first_visit_middleware_is_lazy(client, settings):
+    response = client.get('/no-first-visit/')
+
+    # The user has never been loaded
+    assert response.wsgi_request.user._wrapped is empty
+    assert not response.cookies
 
 
 @pytest.mark.django_db
@@ -23,3 +53,36 @@ def test_first_visit_middleware_when_authenticated(client, user):
     client.force_login(user)
     # First visit
     assert client.get('/first-visit/').content == b'False'
+
+
+def test_path_matcher():
+    matcher = PathMatcher({'/admin': 'admin', '/admin/api': 'api', '/fr': 'fr'})
+
+    assert matcher.match('/admin/pages/') == 'admin'
+    assert matcher.match('/admin/api/pages/') == 'api'
+    assert matcher.match('/fr/') == 'fr'
+    assert matcher.match('/blog/') is None
+    assert matcher.match('/') is None
+    assert PathMatcher({}).match('/admin/') is None
+
+
+@pytest.mark.parametrize('path,language', [
+    ('/admin/', 'fr'),
+    ('/api/', 'en-us'),
+    ('/french/', 'fr'),
+    ('/blog/', None),
+])
+def test_admin_locale_middleware(rf, settings, path, language):
+    settings.WAPPS_LOCALE_PATHS = {
+        '/admin': 'request',
+        '/api': 'default',
+        '/french': 'tests.test_middlewares.french',
+    }
+    middleware = AdminLocaleMiddleware(lambda request: HttpResponse())
+    request = rf.get(path, HTTP_ACCEPT_LANGUAGE='fr')
+
+    try:
+        middleware.process_request(request)
+        assert getattr(request, 'LANGUAGE_CODE', None) == language
+    finally:
+        translation.deactivate()
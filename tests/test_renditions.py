@@ -0,0 +1,71 @@
+import pytest
+
+from django.core.management import call_command
+
+from wapps import renditions, signals
+from wapps.image_formats import FORMATS
+
+pytestmark = pytest.mark.django_db
+
+
+def rendition_specs(image):
+    return set(image.renditions.values_list('filter_spec', flat=True))
+
+
+def test_specs_include_formats_and_settings(settings):
+    settings.WAPPS_RENDITIONS_SPECS = ('fill-10x10', 'original')
+    specs = renditions.get_specs()
+
+    assert set(renditions.SPECS) <= set(specs)
+    assert set(spec for _, _, spec in FORMATS.values()) <= set(specs)
+    assert 'fill-10x10' in specs
+    assert len(specs) == len(set(specs))
+
+
+def test_generate(image):
+    assert renditions.generate(image.pk, ['fill-10x10', 'width-20']) == 2
+    assert rendition_specs(image) == {'fill-10x10', 'width-20'}
+
+
+def test_generate_missing_image():
+    assert renditions.generate(0, ['fill-10x10']) == 0
+
+
+def test_generate_many_reports_progress(image_factory):
+    images = image_factory.create_batch(2)
+    done = []
+
+    count = renditions.generate_many([i.pk for i in images], ['fill-10x10'], 1, lambda pk, c: done.append(pk))
+
+    assert count == 2
+    assert done == [i.pk for i in images]
+
+
+def test_page_images_ids(static_page_factory, image):
+    page = static_page_factory(image=image)
+
+    assert renditions.page_images_ids(page) == {image.pk}
+
+
+def test_prewarm_on_upload_is_opt_in(settings, monkeypatch, image_factory):
+    scheduled = []
+    monkeypatch.setattr(signals.transaction, 'on_commit', lambda func: func())
+    monkeypatch.setattr(renditions, 'prewarm', scheduled.extend)
+
+    image_factory()
+    assert scheduled == []
+
+    settings.WAPPS_RENDITIONS_PREWARM = True
+    image = image_factory()
+    assert scheduled == [image.pk]
+
+
+def test_prewarm_renditions_command(image_factory, capsys):
+    images = image_factory.create_batch(2)
+
+    call_command('prewarm_renditions', spec=['fill-10x10'], concurrency=1)
+
+    out, _ = capsys.readouterr()
+    assert '[2/2]' in out
+    for image in images:
+        assert rendition_specs(image) == {'fill-10x10'}
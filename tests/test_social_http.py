@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+from wapps.social import http
+
+
+@pytest.fixture
+def server(fake_server):
+    return fake_server
+
+
+def test_connections_are_kept_alive(server):
+    client = http.Client(retries=0)
+
+    for _ in range(3):
+        assert client.get(server.url).status_code == 200
+
+    assert server.hits == 3
+    assert len(server.connections) == 1
+
+
+def test_retries_with_backoff(server):
+    client = http.Client(retries=2, backoff=0)
+    server.statuses = [503, 503]
+
+    assert client.get(server.url).status_code == 200
+    assert server.hits == 3
+
+
+def test_circuit_breaker(server):
+    client = http.Client(retries=0, threshold=2, reset_timeout=60)
+    server.statuses = [500, 500]
+    client.get(server.url)
+    client.get(server.url)
+
+    with pytest.raises(http.CircuitOpen):
+        client.get(server.url)
+    assert server.hits == 2
+
+    # Half-open: a single successful trial closes the circuit
+    client.breakers[server.host].timeout = 0
+    assert client.get(server.url).status_code == 200
+    assert client.breakers[server.host].state == 'closed'
+
+
+def test_circuit_breaker_counts_connection_errors():
+    client = http.Client(retries=0, threshold=1)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get('http://127.0.0.1:1/')
+    with pytest.raises(http.CircuitOpen):
+        client.get('http://127.0.0.1:1/')
+
+    stats = client.stats()['127.0.0.1:1']
+    assert stats['requests'] == 1
+    assert stats['errors'] == 1
+    assert stats['refused'] == 1
+
+
+def test_stats(server):
+    client = http.Client(retries=0)
+    server.statuses = [500]
+    client.get(server.url)
+    client.get(server.url)
+
+    stats = client.stats()[server.host]
+
+    assert stats['requests'] == 2
+    assert stats['errors'] == 1
+    assert stats['max_time'] >= stats['avg_time'] > 0
+
+
+def test_shared_client(settings):
+    http.reset()
+    settings.WAPPS_HTTP_POOL_SIZE = 3
+    client = http.get_client()
+
+    assert http.get_client() is client
+    assert client.session.get_adapter('https://instagram.com')._pool_maxsize == 3
+    http.reset()
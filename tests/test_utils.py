@@ -1,4 +1,9 @@
+import pytest
+
+from django.core.urlresolvers import reverse
+
 from wapps import utils
+from wapps.pytest import assert_num_queries
 
 
 def test_timehash_default():
@@ -13,3 +18,72 @@ def test_timehash_different():
     first = utils.timehash()
     second = utils.timehash()
     assert first != second
+
+
+@pytest.mark.django_db
+def test_get_image_url_matches_reverse(image):
+    from wagtail.wagtailimages.views.serve import generate_signature
+    signature = generate_signature(image.id, 'fill-300x300')
+    expected = reverse('wagtailimages_serve', args=(signature, image.id, 'fill-300x300'))
+    expected += image.file.name[len('original_images/'):]
+
+    assert utils.get_image_url(image, 'fill-300x300') == expected
+
+
+@pytest.mark.django_db
+def test_get_image_url_quote_filter_spec(image):
+    url = utils.get_image_url(image, 'fill-300x300|jpegquality-60')
+    assert '/fill-300x300%7Cjpegquality-60/' in url
+
+
+@pytest.mark.django_db
+def test_get_image_urls(image_factory):
+    images = image_factory.create_batch(3)
+    pairs = [(image, specs) for image in images for specs in ('original', 'fill-300x300')]
+
+    urls = utils.get_image_urls(pairs)
+
+    assert urls == [utils.get_image_url(image, specs) for image, specs in pairs]
+
+
+@pytest.mark.django_db
+def test_image_url_resolver_is_request_scoped(image, rf):
+    request = rf.get('/')
+    resolver = utils.image_url_resolver(request)
+
+    assert utils.image_url_resolver(request) is resolver
+    assert resolver.url(image, 'original') == utils.get_image_url(image, 'original')
+    assert (image.id, 'original') in resolver.urls
+    assert utils.image_url_resolver(rf.get('/')) is not resolver
+
+
+@pytest.mark.django_db
+def test_get_site_from_request(rf, site):
+    request = rf.get('/')
+    request.site = site
+
+    with assert_num_queries(0):
+        assert utils.get_site(request) == site
+
+
+@pytest.mark.django_db
+def test_get_site_default_site_is_memoized(rf, site):
+    utils.get_site(rf.get('/'))
+    misses = utils.site_stats['misses']
+    hits = utils.site_stats['hits']
+
+    with assert_num_queries(0):
+        assert utils.get_site(rf.get('/')) == site
+        assert utils.get_site(None) == site
+
+    assert utils.site_stats['misses'] == misses
+    assert utils.site_stats['hits'] == hits + 2
+
+
+@pytest.mark.django_db
+def test_get_site_default_site_invalidated_on_save(rf, site):
+    utils.get_site(rf.get('/'))
+    site.site_name = 'Renamed'
+    site.save()
+
+    assert utils.get_site(rf.get('/')).site_name == 'Renamed'
@@ -1,6 +1,9 @@
 import pytest
 
-from wapps.pytest import assert_redirects
+from django.core.exceptions import ImproperlyConfigured
+
+from wapps import views
+from wapps.pytest import assert_num_queries, assert_redirects
 
 
 @pytest.mark.django_db
@@ -13,3 +16,87 @@ def test_image_view(image, client):
 def test_image_view_image_not_found(client):
     response = client.get('/images/123/original')
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_image_view_lookup_is_cached(image, rf):
+    views.image(rf.get('/'), str(image.pk), 'original')
+
+    with assert_num_queries(0):
+        response = views.image(rf.get('/'), str(image.pk), 'original')
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_image_view_cache_key_is_hashed(image, rf):
+    specs = 'fill-10x10|format-png'
+    views.image(rf.get('/'), str(image.pk), specs)
+
+    key = views.renditions_cache.make_key(views.rendition_key(specs), scope=image.pk)
+    assert specs not in key
+    assert views.renditions_cache.backend.get(key)['name']
+
+
+@pytest.mark.django_db
+def test_image_view_cache_invalidated_on_renditions_deletion(image, client):
+    url = '/images/{pk}/original'.format(pk=image.pk)
+    client.get(url)
+    image.renditions.all().delete()
+
+    response = client.get(url)
+
+    assert_redirects(response, image.get_rendition('original').url, fetch_redirect_response=False)
+
+
+@pytest.mark.django_db
+def test_image_view_direct(image, client, settings):
+    settings.WAPPS_IMAGE_SERVE_MODE = 'direct'
+    rendition = image.get_rendition('original')
+    response = client.get('/images/{pk}/original'.format(pk=image.pk))
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'image/png'
+    with open(rendition.file.path, 'rb') as f:
+        assert b''.join(response.streaming_content) == f.read()
+    assert response['ETag']
+    assert response['Last-Modified']
+    assert 'max-age={0}'.format(settings.WAPPS_IMAGE_MAX_AGE) in response['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_image_view_conditional(image, client, settings):
+    settings.WAPPS_IMAGE_SERVE_MODE = 'direct'
+    url = '/images/{pk}/original'.format(pk=image.pk)
+    etag = client.get(url)['ETag']
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('mode,header', [
+    ('sendfile', 'X-Sendfile'),
+    ('accel', 'X-Accel-Redirect'),
+])
+def test_image_view_delegated(image, client, settings, mode, header):
+    settings.WAPPS_IMAGE_SERVE_MODE = mode
+    rendition = image.get_rendition('original')
+
+    response = client.get('/images/{pk}/original'.format(pk=image.pk))
+
+    assert response.status_code == 200
+    assert response.content == b''
+    if mode == 'sendfile':
+        assert response[header] == rendition.file.path
+    else:
+        assert response[header] == rendition.url
+
+
+@pytest.mark.django_db
+def test_image_view_unknown_serve_mode(image, rf, settings):
+    settings.WAPPS_IMAGE_SERVE_MODE = 'x-accel'
+
+    with pytest.raises(ImproperlyConfigured):
+        views.image(rf.get('/'), str(image.pk), 'original')
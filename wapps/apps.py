@@ -7,12 +7,44 @@ class WappsConfig(AppConfig):
     label = 'wapps'
     verbose_name = 'Wagtail Apps'
 
+    def ready(self):
+        from . import signals  # noqa
+
 
 class WappsSettings(AppConf):
     '''Wapps default settings'''
     FEATURES = (
         'word_count',
     )
+    CACHE = 'default'
+    CACHE_TIMEOUT = 60 * 60 * 24  # Cache for 1 day
+    CACHE_LRU_SIZE = 256
+    GALLERY_JSONLD_MEDIA_LIMIT = None  # Maximum associatedMedia per album
+    RENDITIONS_PREWARM = False  # Generate renditions on image upload and page publication
+    RENDITIONS_SPECS = ()  # Extra specs to pre-generate
+    RENDITIONS_CONCURRENCY = 2
+    IMAGE_SERVE_MODE = 'redirect'  # One of redirect, direct, sendfile or accel
+    IMAGE_MAX_AGE = 60 * 60 * 24 * 365  # Served renditions Cache-Control max-age
+    FEED_LENGTH = 20  # Entries per feed document
+    FEED_ARCHIVE_MAX_AGE = 60 * 60 * 24 * 365  # Feed archives Cache-Control max-age
+    INSTAGRAM_URL = 'https://www.instagram.com/{user}/media/'
+    INSTAGRAM_TIMEOUT = (3.05, 10)  # Connect and read timeouts in seconds
+    INSTAGRAM_REFRESH = 60 * 5  # Refresh snapshots older than 5 minutes
+    INSTAGRAM_LOCK_TIMEOUT = 60  # Maximum duration of a refresh
+    HTTP_POOL_SIZE = 10  # Outbound keep-alive connections per host
+    HTTP_RETRIES = 2
+    HTTP_BACKOFF = 0.3  # Retries exponential backoff factor in seconds
+    HTTP_BREAKER_THRESHOLD = 5  # Consecutive failures opening a host circuit
+    HTTP_BREAKER_TIMEOUT = 30  # Seconds before retrying an open circuit
+    PAGE_CACHE = False  # Cache anonymous pages responses
+    PAGE_CACHE_TIMEOUT = 60 * 5
+    PAGE_CACHE_PURGE_BACKENDS = ('wapps.pagecache.LocalPurgeBackend',)
+    PAGE_CACHE_PURGE_URL = None  # Front cache endpoint used by HTTPPurgeBackend
+    PAGE_CACHE_PURGE_TIMEOUT = (3.05, 10)  # Connect and read timeouts in seconds
+    FIRST_VISIT_COOKIE = 'wapps_visited'
+    FIRST_VISIT_MAX_AGE = 60 * 60 * 24 * 365 * 2
+    INSTRUMENTATION = False  # Server-Timing and stats, requires InstrumentationMiddleware
+    LOCALE_PATHS = {'/admin': 'request'}  # AdminLocaleMiddleware prefixes and their locale strategy
 
     class Meta:
         prefix = 'wapps'
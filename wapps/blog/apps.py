@@ -5,3 +5,6 @@ class BlogConfig(AppConfig):
     name = 'wapps.blog'
     label = 'blog'
     verbose_name = 'Blog'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,96 @@
+'''
+Per-blog tag and category clouds.
+
+Live posts counts are stored in the ``BlogTagCount`` and ``BlogCategoryCount`` tables.
+They are adjusted incrementally when a live post tags or categories change
+and recomputed for a single blog on its posts (un)publication and deletion.
+Templates are served from cache.
+'''
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from wapps.cache import VersionedCache
+from wapps.models import Category
+
+from .models import Blog, BlogCategoryCount, BlogPost, BlogPostCategory, BlogPostTag, BlogTagCount
+
+#: Clouds scoped by blog primary key
+cache = VersionedCache('blog-clouds')
+
+
+def update_counts(blog):
+    '''Recompute the tags and categories counts of a single blog'''
+    posts = BlogPost.objects.live().descendant_of(blog).values('pk')
+    tags = BlogPostTag.objects.filter(content_object__in=posts).values('tag').annotate(count=Count('pk'))
+    categories = BlogPostCategory.objects.filter(page__in=posts).values('category').annotate(
+        count=Count('page', distinct=True)
+    )
+    with transaction.atomic():
+        BlogTagCount.objects.filter(blog_id=blog.pk).delete()
+        BlogTagCount.objects.bulk_create(
+            BlogTagCount(blog_id=blog.pk, tag_id=row['tag'], count=row['count']) for row in tags
+        )
+        BlogCategoryCount.objects.filter(blog_id=blog.pk).delete()
+        BlogCategoryCount.objects.bulk_create(
+            BlogCategoryCount(blog_id=blog.pk, category_id=row['category'], count=row['count']) for row in categories
+        )
+    cache.invalidate(blog.pk)
+
+
+def live_post_blog_id(post_id):
+    '''The blog primary key of a live post, ``None`` if the post is not live'''
+    path = BlogPost.objects.filter(pk=post_id, live=True).values_list('path', flat=True).first()
+    if path:
+        return Blog.objects.filter(path=path[:-BlogPost.steplen]).values_list('pk', flat=True).first()
+
+
+def adjust(model, blog_id, delta, **lookup):
+    '''Increment or decrement a single count row'''
+    counts = model.objects.filter(blog_id=blog_id, **lookup)
+    if delta < 0:
+        counts = counts.filter(count__gt=0)
+    if not counts.update(count=F('count') + delta) and delta > 0:
+        try:
+            with transaction.atomic():
+                model.objects.create(blog_id=blog_id, count=delta, **lookup)
+        except IntegrityError:
+            # Created concurrently
+            counts.update(count=F('count') + delta)
+    cache.invalidate(blog_id)
+
+
+def update_counts_on_commit(path):
+    '''Recompute the counts of the blog at ``path`` once the current transaction is committed, if it still exists'''
+    def update():
+        blog = Blog.objects.filter(path=path).first()
+        if blog:
+            update_counts(blog)
+    transaction.on_commit(update)
+
+
+def build_tags(blog):
+    counts = BlogTagCount.objects.filter(blog_id=blog.pk, count__gt=0).order_by('-count', 'tag__name')
+    tags = []
+    for tag_count in counts.select_related('tag'):
+        tag = tag_count.tag
+        tag.posts_count = tag_count.count
+        tags.append(tag)
+    return tags
+
+
+def build_categories(blog):
+    counts = dict(BlogCategoryCount.objects.filter(blog_id=blog.pk).values_list('category_id', 'count'))
+    categories = list(Category.objects.filter(parent=None).prefetch_related('children'))
+    for category in categories:
+        category.posts_count = counts.get(category.pk, 0)
+    return categories
+
+
+def get_tags(blog):
+    '''The blog tags with their ``posts_count``, most used first'''
+    return cache.get_or_set('tags', lambda: build_tags(blog), scope=blog.pk)
+
+
+def get_categories(blog):
+    '''The root categories with their ``posts_count`` in the blog'''
+    return cache.get_or_set('categories', lambda: build_categories(blog), scope=blog.pk)
@@ -1,17 +1,50 @@
 from urllib import parse
 
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
 from wagtail.wagtailcore.rich_text import expand_db_html
 
 from wapps.feed import SiteFeed
+from wapps.pagination import cached_count
 from wapps.utils import get_image_url
 
 
+def archives_count(total):
+    '''
+    The number of complete archive documents for ``total`` posts.
+
+    The head document always lists between 1 and ``WAPPS_FEED_LENGTH`` posts.
+    '''
+    return (total - 1) // settings.WAPPS_FEED_LENGTH if total else 0
+
+
+def is_archived(blog, post):
+    '''Whether a live post belongs to an archive document rather than the head one'''
+    posts = post.__class__.objects.live().descendant_of(blog)
+    total = posts.count()
+    newer = posts.filter(Q(date__gt=post.date) | Q(date=post.date, pk__gt=post.pk)).count()
+    return newer >= total - archives_count(total) * settings.WAPPS_FEED_LENGTH
+
+
 class BlogFeed(SiteFeed):
-    def __init__(self, blog, *args, **kwargs):
+    '''
+    A blog Atom feed paged as RFC 5005 archives.
+
+    Archives are fixed-size buckets of ``WAPPS_FEED_LENGTH`` posts numbered from the oldest one,
+    so a publication only changes the head document (and, when it completes a bucket,
+    adds a new archive): existing archives keep their URL and content.
+    '''
+    def __init__(self, blog, number=None, *args, **kwargs):
         self.blog = blog
+        self.number = int(number) if number else None
         super().__init__(*args, **kwargs)
 
     def __call__(self, request, *args, **kwargs):
+        if self.number is not None and not 0 < self.number <= self.archives:
+            raise Http404('Unknown feed archive')
         kwargs['page'] = self.blog
         return super().__call__(request, *args, **kwargs)
 
@@ -26,8 +59,72 @@ class BlogFeed(SiteFeed):
     def link(self):
         return self.blog.full_url
 
+    def feed_url(self):
+        return self.url(self.number)
+
+    def url(self, number=None):
+        if number:
+            return self.blog.full_url + self.blog.reverse_subpage('feed_archive', kwargs={'number': number})
+        return self.blog.full_url + self.blog.reverse_subpage('feed')
+
+    @property
+    def max_age(self):
+        # Archives never change
+        return settings.WAPPS_FEED_ARCHIVE_MAX_AGE if self.number else None
+
+    def cache_scope(self):
+        if self.number:
+            return '{0}:archives'.format(self.blog.pk)
+        return self.blog.pk
+
+    def cache_key(self, request):
+        key = super().cache_key(request)
+        if self.number == self.archives:
+            # The newest archive gains a next-archive link once the following bucket is complete
+            key += ':newest'
+        return key
+
+    def queryset(self):
+        return self.blog.get_queryset().order_by('-date', '-pk')
+
+    @cached_property
+    def total(self):
+        return cached_count(self.blog.get_queryset(), self.blog.counts_scope)()
+
+    @cached_property
+    def archives(self):
+        return archives_count(self.total)
+
+    def latest_date(self):
+        dates = [d for post in self.page for d in (post.date, post.last_published_at) if d]
+        return max(dates) if dates else None
+
+    @cached_property
+    def page(self):
+        length = settings.WAPPS_FEED_LENGTH
+        if self.number:
+            start = (self.number - 1) * length
+            return list(self.queryset().reverse()[start:start + length])[::-1]
+        # The posts newer than the last complete archive
+        return list(self.queryset()[:self.total - self.archives * length])
+
+    def feed_extra_kwargs(self, obj):
+        kwargs = super().feed_extra_kwargs(obj)
+        links = []
+        if self.number:
+            kwargs['archive'] = True
+            links.append(('current', self.url()))
+            if self.number > 1:
+                links.append(('prev-archive', self.url(self.number - 1)))
+            if self.number < self.archives:
+                links.append(('next-archive', self.url(self.number + 1)))
+        elif self.archives:
+            links.append(('prev-archive', self.url(self.archives)))
+        kwargs['links'] = links
+        return kwargs
+
     def items(self):
-        return self.blog.get_queryset()[:20]
+        return self.page
 
     def item_title(self, item):
         return item.title
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from wapps.blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = 'Compute blog posts derived text fields (word count, summaries, reading time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help='Only process posts without plain text')
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.all()
+        if options['missing']:
+            posts = posts.filter(plain_text='')
+        count = 0
+        for post in posts.iterator():
+            post.update_text_fields()
+            count += 1
+        self.stdout.write('{0} posts updated'.format(count))
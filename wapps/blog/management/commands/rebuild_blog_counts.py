@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from wapps.blog.counts import update_counts
+from wapps.blog.models import Blog
+
+
+class Command(BaseCommand):
+    help = 'Rebuild blogs tags and categories counts (defaults to all blogs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('blogs', nargs='*', type=int, help='Blogs primary keys')
+
+    def handle(self, *args, **options):
+        blogs = Blog.objects.all()
+        if options['blogs']:
+            blogs = blogs.filter(pk__in=options['blogs'])
+        for blog in blogs:
+            update_counts(blog)
+            self.stdout.write('{0}: {1} tags, {2} categories'.format(
+                blog, blog.tag_counts.count(), blog.category_counts.count()
+            ))
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2026-10-18 03:35
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blog_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['date', 'page_ptr'], name='blog_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpostcategory',
+            index=models.Index(fields=['category', 'page'], name='blog_category_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogposttag',
+            index=models.Index(fields=['tag', 'content_object'], name='blog_tag_post_idx'),
+        ),
+    ]
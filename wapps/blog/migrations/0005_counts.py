@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2026-10-18 03:39
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def populate_counts(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    BlogPostTag = apps.get_model('blog', 'BlogPostTag')
+    BlogPostCategory = apps.get_model('blog', 'BlogPostCategory')
+    BlogTagCount = apps.get_model('blog', 'BlogTagCount')
+    BlogCategoryCount = apps.get_model('blog', 'BlogCategoryCount')
+    for blog in Blog.objects.all():
+        posts = BlogPost.objects.filter(live=True, path__startswith=blog.path).values('pk')
+        tags = BlogPostTag.objects.filter(content_object__in=posts).values('tag').annotate(count=Count('pk'))
+        BlogTagCount.objects.bulk_create(
+            BlogTagCount(blog=blog, tag_id=row['tag'], count=row['count']) for row in tags
+        )
+        categories = BlogPostCategory.objects.filter(page__in=posts).values('category').annotate(
+            count=Count('page', distinct=True)
+        )
+        BlogCategoryCount.objects.bulk_create(
+            BlogCategoryCount(blog=blog, category_id=row['category'], count=row['count']) for row in categories
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taggit', '0002_auto_20150616_2121'),
+        ('wapps', '0022_auto_20171119_0040'),
+        ('blog', '0004_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogCategoryCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_counts', to='blog.Blog')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wapps.Category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BlogTagCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_counts', to='blog.Blog')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taggit.Tag')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='blogtagcount',
+            unique_together=set([('blog', 'tag')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='blogcategorycount',
+            unique_together=set([('blog', 'category')]),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
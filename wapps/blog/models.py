@@ -1,8 +1,10 @@
+import math
 import re
 
-from datetime import date
+from datetime import date, datetime, time, timedelta
 
 from django.db import models
+from django.http import Http404
 from django.utils.dateformat import DateFormat
 from django.utils.formats import date_format
 from django.utils.html import strip_tags
@@ -20,10 +22,12 @@ from wagtail.wagtailcore.fields import RichTextField
 from wagtail.wagtailcore.models import Page, Orderable
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from wagtail.wagtailsearch import index
-from wagtail.utils.pagination import paginate
 
 from wapps import jsonld
-from wapps.models import Category, IdentitySettings
+from wapps.identity import get_identity
+from wapps.models import Category
+from wapps.pagecache import CachedPageMixin
+from wapps.pagination import cached_count, paginate
 from wapps.mixins import RelatedLink
 from wapps.utils import get_image_model
 
@@ -33,8 +37,33 @@ ImageModel = get_image_model()
 
 DEFAULT_PAGE_SIZE = 10
 
+#: Average reading speed in words per minute
+READING_SPEED = 200
+
+
+def blog_key(pk):
+    '''The page cache surrogate key of a blog and its posts'''
+    return 'blog-{0}'.format(pk)
+
+
+def date_range(year, month=None, day=None):
+    '''The ``[start, end)`` aware datetimes bounds of a year, a month or a day in the current timezone'''
+    if day is not None:
+        start = date(year, month, day)
+        end = start + timedelta(days=1)
+    elif month is not None:
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    else:
+        start = date(year, 1, 1)
+        end = date(year + 1, 1, 1)
+    return tuple(
+        timezone.make_aware(datetime.combine(d, time.min))
+        for d in (start, end)
+    )
+
 
-class Blog(RoutablePageMixin, Page):
+class Blog(CachedPageMixin, RoutablePageMixin, Page):
     '''
     A blog root page handling article querying and listing
     '''
@@ -77,11 +106,21 @@ class Blog(RoutablePageMixin, Page):
     def recents(self):
         return self.get_queryset()
 
+    def get_cache_keys(self, request):
+        return super(Blog, self).get_cache_keys(request) + [blog_key(self.pk)]
+
+    def get_listing_queryset(self, qs):
+        '''Fetch everything the listing displays along with the posts'''
+        return qs.select_related('owner', 'image').prefetch_related('tags')
+
+    @property
+    def counts_scope(self):
+        return 'blog:{0}'.format(self.pk)
+
     def get_context(self, request):
         context = super(Blog, self).get_context(request)
-
-        _, posts = paginate(request, self.posts, 'page', DEFAULT_PAGE_SIZE)
-        context['posts'] = posts
+        count = cached_count(self.posts, self.counts_scope)
+        context['posts'] = paginate(request, self.get_listing_queryset(self.posts), DEFAULT_PAGE_SIZE, count=count)
         return context
 
     @property
@@ -97,16 +136,19 @@ class Blog(RoutablePageMixin, Page):
     @route(r'^(\d{4})/(\d{2})/$')
     @route(r'^(\d{4})/(\d{2})/(\d{2})/$')
     def by_date(self, request, year, month=None, day=None, *args, **kwargs):
-        self.posts = self.queryset.filter(first_published_at__year=year)
+        try:
+            start, end = date_range(int(year), int(month) if month else None, int(day) if day else None)
+        except (ValueError, OverflowError):
+            raise Http404('Invalid date')
+        # A range predicate on the indexed date column rather than extracting date parts
+        self.posts = self.queryset.filter(date__gte=start, date__lt=end)
         self.filter_type = _('date')
         self.filter_term = year
         if month:
-            self.posts = self.posts.filter(date__month=month)
-            df = DateFormat(date(int(year), int(month), 1))
+            df = DateFormat(start)
             self.filter_term = df.format('F Y')
         if day:
-            self.posts = self.posts.filter(date__day=day)
-            self.filter_term = date_format(date(int(year), int(month), int(day)))
+            self.filter_term = date_format(start.date())
         return Page.serve(self, request, *args, **kwargs)
 
     @route(r'^tag/(?P<tag>[-_\w]+)/$')
@@ -135,8 +177,16 @@ class Blog(RoutablePageMixin, Page):
         feed = BlogFeed(self)
         return feed(request, *args, **kwargs)
 
+    @route(r'^feed/archive/(?P<number>\d+)/$')
+    def feed_archive(self, request, number, *args, **kwargs):
+        feed = BlogFeed(self, number)
+        return feed(request, *args, **kwargs)
+
     subpage_types = ['blog.BlogPost']
 
+    # Feeds have their own cache and conditional responses
+    uncached_routes = ('feed', 'feed_archive')
+
     def __jsonld__(self, context):
         now = timezone.now()
         data = {
@@ -162,18 +212,34 @@ class BlogPostCategory(models.Model):
         FieldPanel('category'),
     ]
 
+    class Meta:
+        indexes = [
+            # Posts by category
+            models.Index(fields=['category', 'page'], name='blog_category_page_idx'),
+        ]
+
 
 class BlogPostTag(TaggedItemBase):
     content_object = ParentalKey('blog.BlogPost', related_name='tagged_items')
 
+    class Meta:
+        indexes = [
+            # Posts by tag
+            models.Index(fields=['tag', 'content_object'], name='blog_tag_post_idx'),
+        ]
+
 
-class BlogPost(Page):
+class BlogPost(CachedPageMixin, Page):
     '''
     A single blog post (aka. article) page
     '''
     class Meta:
         verbose_name = _('Blog post')
         verbose_name_plural = _('Blog posts')
+        indexes = [
+            # Listings keyset pagination and date ranges
+            models.Index(fields=['date', 'page_ptr'], name='blog_post_date_idx'),
+        ]
 
     body = RichTextField(verbose_name=_('body'))
     excerpt = models.CharField(verbose_name=_('excerpt'), blank=True, max_length=255,
@@ -186,6 +252,14 @@ class BlogPost(Page):
     tags = ClusterTaggableManager(through=BlogPostTag, blank=True)
     categories = models.ManyToManyField(Category, through=BlogPostCategory, blank=True)
 
+    # Derived text fields computed on publication
+    plain_text = models.TextField(editable=False, blank=True)
+    word_count = models.PositiveIntegerField(editable=False, default=0)
+    reading_time = models.PositiveSmallIntegerField(editable=False, default=0,
+                                                    help_text=_('Estimated reading time in minutes'))
+    summary = models.CharField(editable=False, blank=True, max_length=255)
+    short_summary = models.CharField(editable=False, blank=True, max_length=140)
+
     image = models.ForeignKey(
         ImageModel,
         null=True,
@@ -247,16 +321,58 @@ class BlogPost(Page):
         # Find closest ancestor which is a blog index
         return self.get_ancestors().type(Blog).last().specific
 
+    def get_cache_keys(self, request):
+        from .utils import get_blog_context
+        keys = super(BlogPost, self).get_cache_keys(request)
+        parent_path = self.path[:-self.steplen]
+        keys.extend(blog_key(blog.pk) for blog in get_blog_context(request).blogs if blog.path == parent_path)
+        return keys
+
+    #: Whether the stored derived text fields match the content.
+    #: Previews render revisions carrying the derived fields of the last publication.
+    text_fields_current = True
+
+    def serve_preview(self, request, mode_name):
+        self.text_fields_current = False
+        return super(BlogPost, self).serve_preview(request, mode_name)
+
     def summarize(self, length=255):
+        stored = {140: self.short_summary, 255: self.summary}.get(length)
+        if stored and self.text_fields_current:
+            return stored
         text = self.excerpt or self.search_description or self.body
         return Truncator(strip_tags(str(text))).chars(length)
 
+    def get_text_fields(self):
+        '''Compute the derived text fields values from the current content'''
+        plain_text = strip_tags(str(self.body))
+        word_count = len(re.findall(r'\w+', plain_text))
+        text = strip_tags(str(self.excerpt or self.search_description or self.body))
+        return {
+            'plain_text': plain_text,
+            'word_count': word_count,
+            'reading_time': int(math.ceil(word_count / READING_SPEED)),
+            'summary': Truncator(text).chars(255),
+            'short_summary': Truncator(text).chars(140),
+        }
+
+    def update_text_fields(self):
+        '''Store the derived text fields without saving the whole page nor creating a revision'''
+        fields = self.get_text_fields()
+        BlogPost.objects.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
     def __jsonld__(self, context):
         request = context['request']
         site = request.site
-        identity = IdentitySettings.for_site(site)
+        identity = get_identity(site)
         body = str(self.body)
         now = timezone.now()
+        if self.plain_text and self.text_fields_current:
+            word_count = self.word_count
+        else:
+            word_count = self.get_text_fields()['word_count']
         publisher = jsonld.organization(context)
         if identity.amp_logo:
             publisher['logo'] = jsonld.image_object(context, identity.amp_logo, 600, 60)
@@ -272,7 +388,7 @@ class BlogPost(Page):
             'keywords': ','.join(t.name for t in self.tags.all()),
             'articleBody': body,
             'description': self.summarize(140),
-            'wordCount': len(re.findall(r'\w+', strip_tags(body))),
+            'wordCount': word_count,
             'publisher': publisher,
         }
         if self.owner:
@@ -290,6 +406,30 @@ class BlogPost(Page):
 BlogPost._meta.get_field('owner').editable = True
 
 
+class BlogTagCount(models.Model):
+    '''
+    The live posts count of a tag in a blog, maintained by ``wapps.blog.counts``
+    '''
+    blog = models.ForeignKey(Blog, related_name='tag_counts', on_delete=models.CASCADE)
+    tag = models.ForeignKey('taggit.Tag', related_name='+', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('blog', 'tag')
+
+
+class BlogCategoryCount(models.Model):
+    '''
+    The live posts count of a category in a blog, maintained by ``wapps.blog.counts``
+    '''
+    blog = models.ForeignKey(Blog, related_name='category_counts', on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, related_name='+', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('blog', 'category')
+
+
 class BlogBlock(blocks.StructBlock):
     title = blocks.CharBlock(label=_('Title'), required=False)
     nb_articles = blocks.IntegerBlock(label=_('Number of articles'), default=3)
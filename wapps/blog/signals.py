@@ -0,0 +1,95 @@
+'''
+Blog feeds, listings, clouds and sites invalidation signal handlers
+'''
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from taggit.models import Tag
+from wagtail.wagtailcore.models import Page, Site
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+
+from wapps import pagecache
+from wapps.feed import feeds_cache
+from wapps.models import Category
+from wapps.pagination import counts_cache
+
+from . import counts, utils
+from .feeds import is_archived
+from .models import blog_key, Blog, BlogCategoryCount, BlogPost, BlogPostCategory, BlogPostTag, BlogTagCount
+
+
+@receiver(page_published, sender=Blog)
+@receiver(page_unpublished, sender=Blog)
+def on_blog_publication(sender, instance, **kwargs):
+    feeds_cache.invalidate(instance.pk)
+    utils.cache.invalidate()
+    pagecache.purge(blog_key(instance.pk))
+
+
+@receiver(post_save, sender=Page)
+def on_page_moved(sender, instance, created, **kwargs):
+    # Page.move() saves a fresh non-specific Page instance, blogs may move along with their ancestors
+    if not created:
+        utils.cache.invalidate()
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def on_blog_site_changed(sender, **kwargs):
+    utils.cache.invalidate()
+
+
+@receiver(page_published, sender=BlogPost)
+@receiver(page_unpublished, sender=BlogPost)
+def on_post_publication(sender, instance, **kwargs):
+    blog = instance.get_ancestors().type(Blog).last()
+    if not blog:
+        return
+    feeds_cache.invalidate(blog.pk)
+    counts_cache.invalidate('blog:{0}'.format(blog.pk))
+    counts.update_counts(blog)
+    # Listings, clouds and latest posts are displayed by the blog and all its posts
+    pagecache.purge(blog_key(blog.pk))
+    # A new post only changes the archives when it is back-dated into one of them
+    first_publication = kwargs['signal'] is page_published and instance.first_published_at == instance.last_published_at
+    if not first_publication or is_archived(blog, instance):
+        feeds_cache.invalidate('{0}:archives'.format(blog.pk))
+
+
+@receiver(page_published, sender=BlogPost)
+def on_post_published(sender, instance, **kwargs):
+    instance.update_text_fields()
+
+
+@receiver(post_delete, sender=BlogPost)
+def on_post_deleted(sender, instance, **kwargs):
+    # The blog may be deleted along with its posts
+    parent_path = instance.path[:-instance.steplen]
+    counts.update_counts_on_commit(parent_path)
+
+
+@receiver(post_save, sender=BlogPostTag)
+@receiver(post_delete, sender=BlogPostTag)
+def on_post_tag_changed(sender, instance, **kwargs):
+    blog_id = counts.live_post_blog_id(instance.content_object_id)
+    if blog_id and kwargs.get('created', True):
+        delta = -1 if kwargs['signal'] is post_delete else 1
+        counts.adjust(BlogTagCount, blog_id, delta, tag_id=instance.tag_id)
+
+
+@receiver(post_save, sender=BlogPostCategory)
+@receiver(post_delete, sender=BlogPostCategory)
+def on_post_category_changed(sender, instance, **kwargs):
+    blog_id = counts.live_post_blog_id(instance.page_id)
+    if blog_id and kwargs.get('created', True):
+        delta = -1 if kwargs['signal'] is post_delete else 1
+        counts.adjust(BlogCategoryCount, blog_id, delta, category_id=instance.category_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def on_cloud_term_changed(sender, **kwargs):
+    counts.cache.invalidate()
@@ -1,13 +1,108 @@
+'''
+Site to blogs resolution and request-scoped blog helpers.
+
+Live blogs are mapped to their site from tree paths,
+cached and memoized on the request.
+The map is invalidated on blogs publication, pages moves and deletions and sites changes.
+'''
+from django.utils.functional import cached_property
+
+from wagtail.wagtailcore.models import Site
+
+from wapps.cache import VersionedCache
+from wapps.utils import get_site
+
+from . import counts
 from .models import Blog
 
+cache = VersionedCache('site-blogs')
+
+
+def build_site_blogs():
+    '''Map sites primary keys to their live blogs in tree order'''
+    roots = sorted(Site.objects.values_list('root_page__path', 'pk'), key=lambda r: len(r[0]), reverse=True)
+    site_blogs = dict((site_id, []) for _, site_id in roots)
+    for blog in Blog.objects.live().order_by('path'):
+        # The deepest site root containing the blog
+        for path, site_id in roots:
+            if blog.path.startswith(path) and blog.path != path:
+                site_blogs[site_id].append(blog)
+                break
+    return dict((site_id, tuple(blogs)) for site_id, blogs in site_blogs.items())
+
+
+def get_site_blogs(site, request=None):
+    '''The live blogs of a site'''
+    site_blogs = getattr(request, '_wapps_site_blogs', None)
+    if site_blogs is None:
+        site_blogs = cache.get_or_set('blogs', build_site_blogs)
+        if request is not None:
+            request._wapps_site_blogs = site_blogs
+    return site_blogs.get(site.pk, ())
+
+
+def get_site_blog(site, request=None):
+    '''The first live blog of a site'''
+    blogs = get_site_blogs(site, request)
+    return blogs[0] if blogs else None
+
+
+class BlogContext(object):
+    '''
+    The current blog data shared by all the blog template helpers of a request.
+
+    Everything is lazily computed once per request.
+    '''
+    def __init__(self, request):
+        self.request = request
+        self._urls = {}
+
+    @cached_property
+    def site(self):
+        return get_site(self.request)
+
+    @cached_property
+    def blogs(self):
+        return get_site_blogs(self.site, self.request)
+
+    @cached_property
+    def blog(self):
+        return self.blogs[0] if self.blogs else None
+
+    @cached_property
+    def feed_url(self):
+        if self.blog:
+            return self.blog.full_url + self.blog.reverse_subpage('feed')
+
+    @cached_property
+    def tags(self):
+        return counts.get_tags(self.blog) if self.blog else []
+
+    @cached_property
+    def categories(self):
+        return counts.get_categories(self.blog) if self.blog else []
+
+    @cached_property
+    def latest_posts(self):
+        return self.blog.get_queryset() if self.blog else []
+
+    def url(self, resolve, name, *args, **kwargs):
+        '''Memoize a blog route URL resolved by ``resolve(blog, name, *args, **kwargs)``'''
+        if not self.blog:
+            return None
+        key = (name, args, tuple(sorted(kwargs.items())))
+        if key not in self._urls:
+            self._urls[key] = resolve(self.blog, name, *args, **kwargs)
+        return self._urls[key]
+
 
-def get_site_blog(site):
-    for blog in Blog.objects.live():
-        if site.root_page in blog.get_ancestors():
-            return blog
+def get_blog_context(request):
+    '''The blog context lazily attached to a request'''
+    blog_context = getattr(request, '_wapps_blog_context', None)
+    if blog_context is None:
+        blog_context = request._wapps_blog_context = BlogContext(request)
+    return blog_context
 
 
 def get_blog_from_context(context):
-    request = context['request']
-    site = request.site
-    return get_site_blog(site)
+    return get_blog_context(context['request']).blog
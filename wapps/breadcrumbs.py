@@ -0,0 +1,56 @@
+'''
+Breadcrumbs built from the treebeard materialized path.
+
+Ancestors are fetched in a single query from the page ``path``,
+their URLs resolved against the cached site root paths map
+and the result is cached per site and page path.
+'''
+from collections import namedtuple
+
+from wagtail.wagtailcore.models import Page, Site
+
+from .cache import VersionedCache
+from .utils import page_url_parts
+
+#: A breadcrumb entry, ``url`` is relative when the page belongs to the current site
+Crumb = namedtuple('Crumb', ('title', 'url', 'full_url', 'depth', 'path'))
+
+cache = VersionedCache('breadcrumbs')
+
+
+def ancestors_paths(path):
+    '''All ancestors paths of a given path, excluding the tree root'''
+    steplen = Page.steplen
+    return [path[:end] for end in range(2 * steplen, len(path), steplen)]
+
+
+def make_crumb(site, root_paths, title, url_path, depth, path):
+    parts = page_url_parts(url_path, root_paths) if url_path else None
+    if parts is None:
+        return Crumb(title, None, None, depth, path)
+    site_id, root_url, page_path = parts
+    url = page_path if site_id == site.pk else root_url + page_path
+    return Crumb(title, url, root_url + page_path, depth, path)
+
+
+def build_ancestors(site, path):
+    paths = ancestors_paths(path)
+    if not paths:
+        return ()
+    root_paths = Site.get_site_root_paths()
+    rows = Page.objects.filter(path__in=paths).order_by('path').values_list('title', 'url_path', 'depth', 'path')
+    return tuple(make_crumb(site, root_paths, *row) for row in rows)
+
+
+def get_breadcrumbs(page, site):
+    '''
+    The breadcrumbs of a page, from the first level below the tree root to the page itself.
+
+    The page itself is always resolved from the given instance
+    so previews and drafts display their own title.
+    '''
+    ancestors = ()
+    if page.path:
+        ancestors = cache.get_or_set(page.path, lambda: build_ancestors(site, page.path), scope=site.pk)
+    crumb = make_crumb(site, Site.get_site_root_paths(), page.title, page.url_path, page.depth, page.path)
+    return list(ancestors) + [crumb]
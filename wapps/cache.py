@@ -0,0 +1,170 @@
+'''
+Versioned caching helpers.
+
+Values are stored in the Django cache backend (``WAPPS_CACHE`` alias)
+and mirrored into a small in-process LRU.
+Each namespace (and optionally each scope inside a namespace, ie. a site)
+carries a version number stored in the shared cache:
+bumping it invalidates every matching value in every process.
+Versions start from a random token so an evicted version never brings stale values back.
+'''
+import random
+import threading
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+#: All known namespaces, used to clear local caches at once
+REGISTRY = {}
+
+_MISSING = object()
+
+_random = random.SystemRandom()
+
+
+def initial_version():
+    '''A random starting version, unlikely to match any previous (evicted) one'''
+    return _random.getrandbits(48)
+
+
+class LRUCache(object):
+    '''A minimal thread-safe in-process LRU mapping'''
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionedCache(object):
+    '''
+    A namespaced cache whose entries are invalidated by version bumps.
+
+    Keys are built from the namespace version, the scope version and the key itself,
+    so invalidating only requires to increment a counter.
+    '''
+    def __init__(self, namespace, timeout=None, maxsize=None):
+        self.namespace = namespace
+        self._timeout = timeout
+        self.local = LRUCache(maxsize or settings.WAPPS_CACHE_LRU_SIZE)
+        REGISTRY[namespace] = self
+
+    @property
+    def backend(self):
+        return caches[settings.WAPPS_CACHE]
+
+    @property
+    def timeout(self):
+        return self._timeout if self._timeout is not None else settings.WAPPS_CACHE_TIMEOUT
+
+    def version_key(self, scope=None):
+        return 'wapps:{0}:version:{1}'.format(self.namespace, '' if scope is None else scope)
+
+    def versions(self, scope=None):
+        '''Fetch the namespace and scope versions in a single cache round-trip'''
+        keys = [self.version_key()]
+        if scope is not None:
+            keys.append(self.version_key(scope))
+        return tuple(self._fetch_versions(keys))
+
+    def scopes_versions(self, scopes):
+        '''Fetch the versions of many scopes (without the namespace one) in a single cache round-trip'''
+        return self._fetch_versions([self.version_key(scope) for scope in scopes])
+
+    def _fetch_versions(self, keys):
+        found = self.backend.get_many(keys)
+        for key in keys:
+            if key not in found:
+                # Never overwrite a version initialized concurrently
+                version = initial_version()
+                if not self.backend.add(key, version, None):
+                    version = self.backend.get(key, version)
+                found[key] = version
+        return [found[key] for key in keys]
+
+    def make_key(self, key, scope=None, versions=None):
+        '''The full versioned key, from some already fetched ``versions()`` if given'''
+        versions = ':'.join(str(v) for v in (versions or self.versions(scope)))
+        return 'wapps:{0}:{1}:{2}:{3}'.format(self.namespace, versions, '' if scope is None else scope, key)
+
+    def get(self, key, scope=None, default=None):
+        full_key = self.make_key(key, scope)
+        value = self.local.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = self.backend.get(full_key, _MISSING)
+            if value is _MISSING:
+                return default
+            self.local.set(full_key, value)
+        return value
+
+    def set(self, key, value, scope=None):
+        self.store(self.make_key(key, scope), value)
+
+    def store(self, full_key, value):
+        '''Store a value under a key already resolved by ``make_key()``'''
+        self.backend.set(full_key, value, self.timeout)
+        self.local.set(full_key, value)
+
+    def get_or_set(self, key, builder, scope=None):
+        '''Get a cached value or build it with ``builder()`` and store it'''
+        full_key = self.make_key(key, scope)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = self.backend.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = builder()
+            self.backend.set(full_key, value, self.timeout)
+        self.local.set(full_key, value)
+        return value
+
+    def invalidate(self, scope=None):
+        '''Invalidate a whole scope or the whole namespace if no scope is given'''
+        key = self.version_key(scope)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            # Version not initialized or evicted
+            self.backend.set(key, initial_version(), None)
+        self.local.clear()
+
+    def clear(self):
+        '''Clear the local (in-process) cache only'''
+        self.local.clear()
+
+
+def clear_local_caches():
+    '''Clear all in-process caches'''
+    for cache in REGISTRY.values():
+        cache.clear()
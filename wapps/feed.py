@@ -1,12 +1,28 @@
+import hashlib
+import io
+
+from calendar import timegm
+
 from django.conf import settings
 from django.contrib.syndication.views import Feed
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, urlencode
+from django.utils.xmlutils import SimplerXMLGenerator
 
 from wagtail.wagtailcore.models import Site
 
+from wapps import instrumentation
+from wapps.cache import VersionedCache
+from wapps.identity import get_identity
+from wapps.instrumentation import timed
 from wapps.templatetags.seo import Metadata
 from wapps.utils import get_image_url
-from wapps.models import IdentitySettings
+
+#: Rendered feeds, scoped by ``SiteFeed.cache_scope()``
+feeds_cache = VersionedCache('feeds')
 
 
 class ExtendedAtomFeed(Atom1Feed):
@@ -15,21 +31,31 @@ class ExtendedAtomFeed(Atom1Feed):
      - content
      - media
      - webfeeds
+     - fh (RFC 5005 feed history, archive documents only)
     '''
     namespaces = {
         'content': 'http://purl.org/rss/1.0/modules/content/',
         'media': 'http://search.yahoo.com/mrss/',
         'webfeeds': 'http://webfeeds.org/rss/1.0',
     }
+    history_namespace = 'http://purl.org/syndication/history/1.0'
 
     def root_attributes(self):
         attrs = super(ExtendedAtomFeed, self).root_attributes()
         attrs.update(('xmlns:{0}'.format(ns), url) for ns, url in self.namespaces.items())
+        if self.feed.get('archive'):
+            attrs['xmlns:fh'] = self.history_namespace
         return attrs
 
     def add_root_elements(self, handler):
         super(ExtendedAtomFeed, self).add_root_elements(handler)
 
+        # RFC 5005 paging and archives links
+        for rel, href in self.feed.get('links', ()):
+            handler.addQuickElement('link', '', {'rel': rel, 'href': href})
+        if self.feed.get('archive'):
+            handler.addQuickElement('fh:archive', '')
+
         if self.feed.get('image'):
             # Feedly cover image
             handler.addQuickElement('webfeeds:cover', '', {
@@ -58,6 +84,36 @@ class ExtendedAtomFeed(Atom1Feed):
                 'engine': 'GoogleAnalytics',
             })
 
+    def stream(self, encoding='utf-8'):
+        '''
+        Yield the encoded document chunk by chunk (one per entry)
+        instead of writing it fully to an output file
+        '''
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk.encode(encoding)
+
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+        yield flush()
+        for item in self.items:
+            handler.startElement('entry', self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement('entry')
+            yield flush()
+        handler.endElement('feed')
+        yield flush()
+
+    @timed('feed.render')
+    def write(self, outfile, encoding):
+        return super().write(outfile, encoding)
+
     def cdata(self, handler, name, content, attrs=None):
         handler.startElement(name, attrs or {})
         cdata = '<![CDATA[{}]]>'.format(content or '')
@@ -81,13 +137,90 @@ class ExtendedAtomFeed(Atom1Feed):
 
 class SiteFeed(Feed):
     feed_type = ExtendedAtomFeed
+    #: Public Cache-Control max-age of cached feeds, if any
+    max_age = None
+    #: Query parameters changing the rendered feed, any other one shares the same cache entry
+    cache_query_params = ()
 
     def __call__(self, request, *args, **kwargs):
         self.request = request
         self.site = Site.find_for_request(self.request)
-        self.identity = IdentitySettings.for_site(self.site)
+        self.identity = get_identity(self.site)
         self.meta = Metadata(request=request, site=self.site, page=kwargs.get('page', None))
-        return super().__call__(request, *args, **kwargs)
+        scope = self.cache_scope()
+        if scope is None:
+            return super().__call__(request, *args, **kwargs)
+        return self.serve_cached(request, scope, *args, **kwargs)
+
+    def cache_scope(self):
+        '''The rendered feed cache scope, ``None`` disables caching'''
+        return None
+
+    def cache_key(self, request):
+        '''The rendered feed cache key, within its scope'''
+        query = urlencode(sorted(
+            (name, request.GET.getlist(name)) for name in self.cache_query_params if name in request.GET
+        ), doseq=True)
+        path = hashlib.md5('{0}?{1}'.format(request.path, query).encode('utf-8')).hexdigest()
+        return '{0}:{1}'.format(self.site.pk, path)
+
+    def latest_date(self):
+        '''The newest item modification date, used for conditional requests'''
+        return None
+
+    @timed('feed.build')
+    def get_feed(self, obj, request):
+        return super().get_feed(obj, request)
+
+    def serve_cached(self, request, scope, *args, **kwargs):
+        '''
+        Serve the feed from the cache or stream it while caching it.
+
+        Conditional requests are answered from the cached ETag and Last-Modified
+        or from ``latest_date()`` on cache miss, without rendering the feed.
+        '''
+        key = self.cache_key(request)
+        cached = feeds_cache.get(key, scope=scope)
+        if cached:
+            etag, last_modified = cached['etag'], cached['last_modified']
+        else:
+            latest = self.latest_date()
+            last_modified = timegm(latest.utctimetuple()) if latest else None
+            # Resolved before rendering so a concurrent invalidation never stores a stale body as fresh
+            versions = feeds_cache.versions(scope)
+            full_key = feeds_cache.make_key(key, scope, versions)
+            etag = '"{0}"'.format(hashlib.md5('{0}:{1}'.format(full_key, last_modified).encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None and cached:
+            response = HttpResponse(cached['body'], content_type=cached['content_type'])
+        elif response is None:
+            try:
+                obj = self.get_object(request, *args, **kwargs)
+            except ObjectDoesNotExist:
+                raise Http404('Feed object does not exist.')
+            feedgen = self.get_feed(obj, request)
+
+            def stream():
+                chunks = []
+                for chunk in instrumentation.timed_iter('feed.render', feedgen.stream('utf-8')):
+                    chunks.append(chunk)
+                    yield chunk
+                feeds_cache.store(full_key, {
+                    'body': b''.join(chunks),
+                    'content_type': feedgen.content_type,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                })
+
+            response = StreamingHttpResponse(stream(), content_type=feedgen.content_type)
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        if self.max_age:
+            patch_cache_control(response, public=True, max_age=self.max_age)
+        return response
 
     def feed_extra_kwargs(self, obj):
         kwargs = super().feed_extra_kwargs(obj)
@@ -97,8 +230,8 @@ class SiteFeed(Feed):
             kwargs['color'] = self.identity.bg_color
         if self.identity.favicon:
             kwargs['favicon'] = get_image_url(self.identity.favicon, 'fill-16x16')
-        if self.identity.svg_logo:
-            kwargs['svg_logo'] = self.identity.svg_logo.url
+        if self.identity.svg_logo_url:
+            kwargs['svg_logo'] = self.identity.svg_logo_url
         if getattr(settings, 'GOOGLE_ANALYTICS_ID', None):
             kwargs['googleanalytics_id'] = settings.GOOGLE_ANALYTICS_ID
         return kwargs
@@ -5,3 +5,6 @@ class GalleryConfig(AppConfig):
     name = 'wapps.gallery'
     label = 'gallery'
     verbose_name = 'Gallery'
+
+    def ready(self):
+        from . import signals  # noqa
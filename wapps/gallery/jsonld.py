@@ -0,0 +1,139 @@
+'''
+Batched JSON-LD builders for galleries and albums.
+
+Albums images, covers and renditions are fetched for all albums at once
+so a gallery JSON-LD is built with a constant number of queries.
+'''
+from collections import defaultdict
+
+from django.conf import settings
+
+from wagtail.wagtailimages import get_image_model
+from wagtail.wagtailimages.models import Filter
+
+from wapps.utils import image_url_resolver
+
+ORIGINAL = 'original'
+THUMBNAIL = 'fill-300x300'
+
+
+def album_images_ids(albums):
+    '''
+    Map each album primary key to its ordered images primary keys.
+
+    Tag-based albums images are read from the materialized memberships
+    and manual albums images with a single ordered query.
+    '''
+    from .models import AlbumMembership, ManualAlbum, ManualAlbumImage
+
+    ids = defaultdict(list)
+    manual_ids = [a.pk for a in albums if isinstance(a, ManualAlbum)]
+    tagged_ids = [a.pk for a in albums if not isinstance(a, ManualAlbum)]
+
+    if manual_ids:
+        rows = ManualAlbumImage.objects.filter(page_id__in=manual_ids).order_by('page_id', 'sort_order')
+        for album_id, image_id in rows.values_list('page_id', 'image_id'):
+            ids[album_id].append(image_id)
+
+    if tagged_ids:
+        rows = AlbumMembership.objects.filter(album_id__in=tagged_ids).order_by('album_id', 'image_id')
+        for album_id, image_id in rows.values_list('album_id', 'image_id'):
+            ids[album_id].append(image_id)
+
+    return ids
+
+
+def original_renditions(images):
+    '''Fetch or create the original rendition of many images at once'''
+    images = [i for i in images if i]
+    if not images:
+        return {}
+    model = get_image_model()
+    Rendition = model.get_rendition_model()
+    original = Filter(spec=ORIGINAL)
+    keys = {image.pk: original.get_cache_key(image) for image in images}
+    renditions = {}
+    qs = Rendition.objects.filter(image_id__in=keys.keys(), filter_spec=ORIGINAL)
+    for rendition in qs:
+        if keys[rendition.image_id] == rendition.focal_point_key:
+            renditions[rendition.image_id] = rendition
+    for image in images:
+        if image.pk not in renditions:
+            renditions[image.pk] = image.get_rendition(original)
+    return renditions
+
+
+def albums_jsonld(context, albums, limit=None):
+    '''
+    Build the JSON-LD of many albums with a constant number of queries.
+
+    ``limit`` caps the ``associatedMedia`` entries per album and defaults
+    to the ``WAPPS_GALLERY_JSONLD_MEDIA_LIMIT`` setting (``None`` means unlimited).
+    '''
+    request = context['request']
+    albums = list(albums)
+    if limit is None:
+        limit = settings.WAPPS_GALLERY_JSONLD_MEDIA_LIMIT
+
+    images_ids = album_images_ids(albums)
+    if limit is not None:
+        images_ids = {pk: ids[:limit] for pk, ids in images_ids.items()}
+
+    needed = set(a.image_id for a in albums if a.image_id)
+    for ids in images_ids.values():
+        needed.update(ids)
+    images = get_image_model().objects.in_bulk(needed) if needed else {}
+
+    covers = original_renditions(images.get(a.image_id) for a in albums)
+
+    urls = image_url_resolver(request)
+    urls.prefetch(
+        (images[pk], specs)
+        for ids in images_ids.values() for pk in ids if pk in images
+        for specs in (ORIGINAL, THUMBNAIL)
+    )
+
+    return [
+        album_jsonld(context, album, [images[pk] for pk in images_ids.get(album.pk, []) if pk in images],
+                     covers.get(album.image_id), urls)
+        for album in albums
+    ]
+
+
+def album_jsonld(context, album, images, cover, urls):
+    request = context['request']
+    data = {
+        '@type': 'ImageGallery',
+        '@id': album.full_url,
+        'url': album.full_url,
+        'name': album.seo_title or album.title,
+        'associatedMedia': []
+    }
+    if album.first_published_at:
+        # Prevent pre wagtail 1.11 pages to fail
+        date_modified = album.last_published_at or album.first_published_at
+        data.update({
+            'datePublished': album.first_published_at.isoformat(),
+            'dateModified': date_modified.isoformat(),
+        })
+    if cover:
+        data['image'] = request.site.root_url + cover.url
+
+    for image in images:
+        media = {
+            '@type': 'ImageObject',
+            'name': image.title,
+            'contentUrl': urls.url(image, ORIGINAL),
+            'thumbnail': {
+                '@type': 'ImageObject',
+                'contentUrl': urls.url(image, THUMBNAIL),
+                'width': 300,
+                'height': 300,
+            }
+        }
+        if image.details:
+            media['description'] = image.details
+
+        data['associatedMedia'].append(media)
+
+    return data
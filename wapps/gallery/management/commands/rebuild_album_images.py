@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from wapps.gallery import membership
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized album images membership from tags'
+
+    def handle(self, *args, **options):
+        count = membership.rebuild()
+        self.stdout.write('Rebuilt {0} album image memberships'.format(count))
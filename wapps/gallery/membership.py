@@ -0,0 +1,81 @@
+'''
+Album to image membership maintenance.
+
+Tag-based albums images are materialized into :class:`~wapps.gallery.models.AlbumMembership`
+which is kept in sync when album or image tags change.
+'''
+from django.contrib.contenttypes.models import ContentType
+
+from wagtail.wagtailimages import get_image_model
+
+
+def image_tags_queryset():
+    '''The tagged items queryset for the image model'''
+    model = get_image_model()
+    return model.tags.through.objects.filter(content_type=ContentType.objects.get_for_model(model))
+
+
+def tagged_albums():
+    '''Tag-based albums (manual albums have their own images)'''
+    from .models import Album
+    return Album.objects.filter(manualalbum__isnull=True)
+
+
+def sync(album_ids, image_ids, expected, add=True):
+    '''
+    Synchronize memberships restricted to ``album_ids`` x ``image_ids`` (``None`` means no restriction)
+    with the ``expected`` set of ``(album_id, image_id)``.
+    Only removals are performed when ``add`` is ``False``.
+    '''
+    from .models import AlbumMembership
+    qs = AlbumMembership.objects.all()
+    if album_ids is not None:
+        qs = qs.filter(album_id__in=album_ids)
+    if image_ids is not None:
+        qs = qs.filter(image_id__in=image_ids)
+    rows = qs.values_list('pk', 'album_id', 'image_id')
+    existing = dict(((album_id, image_id), pk) for pk, album_id, image_id in rows)
+
+    stale = [pk for key, pk in existing.items() if key not in expected]
+    if stale:
+        AlbumMembership.objects.filter(pk__in=stale).delete()
+    if add:
+        AlbumMembership.objects.bulk_create(
+            AlbumMembership(album_id=album_id, image_id=image_id)
+            for album_id, image_id in expected if (album_id, image_id) not in existing
+        )
+
+
+def update_album(album_id, add=True):
+    '''Update a single album memberships from its tags'''
+    from .models import AlbumTag
+    if not tagged_albums().filter(pk=album_id).exists():
+        return
+    tags = AlbumTag.objects.filter(content_object_id=album_id).values_list('tag_id', flat=True)
+    image_ids = image_tags_queryset().filter(tag_id__in=list(tags)).values_list('object_id', flat=True)
+    sync([album_id], None, set((album_id, image_id) for image_id in image_ids), add=add)
+
+
+def update_image(image_id, add=True):
+    '''Update a single image memberships from its tags'''
+    from .models import AlbumTag
+    tags = image_tags_queryset().filter(object_id=image_id).values_list('tag_id', flat=True)
+    album_ids = AlbumTag.objects.filter(
+        tag_id__in=list(tags),
+        content_object__in=tagged_albums(),
+    ).values_list('content_object_id', flat=True)
+    sync(None, [image_id], set((album_id, image_id) for album_id in album_ids), add=add)
+
+
+def rebuild():
+    '''Rebuild all memberships from scratch and return the number of memberships'''
+    from .models import AlbumTag
+    images_by_tag = {}
+    for image_id, tag_id in image_tags_queryset().values_list('object_id', 'tag_id'):
+        images_by_tag.setdefault(tag_id, set()).add(image_id)
+    expected = set()
+    rows = AlbumTag.objects.filter(content_object__in=tagged_albums()).values_list('content_object_id', 'tag_id')
+    for album_id, tag_id in rows:
+        expected.update((album_id, image_id) for image_id in images_by_tag.get(tag_id, ()))
+    sync(None, None, expected)
+    return len(expected)
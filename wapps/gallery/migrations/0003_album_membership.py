@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.8 on 2026-10-18 03:09
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from wapps.utils import get_image_model
+
+
+def populate_memberships(apps, schema_editor):
+    AlbumTag = apps.get_model('gallery', 'AlbumTag')
+    AlbumMembership = apps.get_model('gallery', 'AlbumMembership')
+    ManualAlbum = apps.get_model('gallery', 'ManualAlbum')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    app_label, model_name = get_image_model().lower().split('.')
+    try:
+        content_type = ContentType.objects.get(app_label=app_label, model=model_name)
+    except ContentType.DoesNotExist:
+        return  # Fresh database, nothing to populate
+
+    images_by_tag = {}
+    for image_id, tag_id in TaggedItem.objects.filter(content_type=content_type).values_list('object_id', 'tag_id'):
+        images_by_tag.setdefault(tag_id, set()).add(image_id)
+
+    manual_ids = set(ManualAlbum.objects.values_list('pk', flat=True))
+    memberships = set()
+    for album_id, tag_id in AlbumTag.objects.values_list('content_object_id', 'tag_id'):
+        if album_id not in manual_ids:
+            memberships.update((album_id, image_id) for image_id in images_by_tag.get(tag_id, ()))
+
+    AlbumMembership.objects.bulk_create(
+        AlbumMembership(album_id=album_id, image_id=image_id) for album_id, image_id in memberships
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0002_auto_20150616_2121'),
+        ('wapps', '0022_auto_20171119_0040'),
+        ('gallery', '0002_manual_album_image_deletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlbumMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('album', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='gallery.Album')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='album_memberships', to=get_image_model())),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='albummembership',
+            unique_together=set([('album', 'image')]),
+        ),
+        migrations.RunPython(populate_memberships, migrations.RunPython.noop),
+    ]
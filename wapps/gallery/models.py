@@ -1,24 +1,38 @@
 from django.db import models
+from django.http import JsonResponse
 from django.utils.translation import ugettext_lazy as _
 
+from wagtail.contrib.wagtailroutablepage.models import RoutablePageMixin, route
 from wagtail.wagtailcore.fields import RichTextField
 from wagtail.wagtailcore.models import Page, Orderable
 from wagtail.wagtailadmin.edit_handlers import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from wagtail.wagtailimages import get_image_model, get_image_model_string
 from wagtail.wagtailsearch import index
+from wagtail.utils.pagination import paginate
 
 from modelcluster.fields import ParentalKey
 from modelcluster.tags import ClusterTaggableManager
 
 from taggit.models import TaggedItemBase
 
-from wapps.utils import get_image_url
+from wapps.pagecache import CachedPageMixin
+from wapps.utils import image_url_resolver
+
+from .jsonld import ORIGINAL, albums_jsonld
 
 ImageModel = get_image_model_string()
 
+DEFAULT_PAGE_SIZE = 24
+THUMBNAIL = 'fill-400x380'
+
+
+def album_key(pk):
+    '''The page cache surrogate key of an album images'''
+    return 'album-{0}'.format(pk)
+
 
-class Gallery(Page):
+class Gallery(CachedPageMixin, Page):
     intro = RichTextField(_('Introduction'), blank=True,
                           help_text=_('A text to be displayed before albums'))
 
@@ -86,7 +100,7 @@ class Gallery(Page):
         if self.feed_image:
             data['image'] = request.site.root_url + self.feed_image.get_rendition('original').url
 
-        data['hasPart'] = [album.__jsonld__(context) for album in self.children]
+        data['hasPart'] = albums_jsonld(context, self.children)
 
         return data
 
@@ -97,7 +111,7 @@ class AlbumTag(TaggedItemBase):
     )
 
 
-class Album(Page):
+class Album(CachedPageMixin, RoutablePageMixin, Page):
     tags = ClusterTaggableManager(through=AlbumTag, blank=True)
 
     intro = RichTextField(_('Introduction'), blank=True,
@@ -128,19 +142,61 @@ class Album(Page):
         # Find closest ancestor which is a Gallery index
         return self.get_ancestors().type(Gallery).specific().last()
 
+    # Only the HTML pages are cached
+    uncached_routes = ('images_json',)
+
+    def get_cache_keys(self, request):
+        return super(Album, self).get_cache_keys(request) + [album_key(self.pk)]
+
     def get_context(self, request):
         context = super(Album, self).get_context(request)
-        context['images'] = self.get_images(request)
+        context['images'] = self.paginate_images(request)
         return context
 
-    def get_images(self, request):
-        tags = self.tags.all()
+    def paginate_images(self, request):
+        '''Only the requested page of images is fetched'''
+        _, images = paginate(request, self.get_images(request), 'page', DEFAULT_PAGE_SIZE)
+        return images
+
+    @route(r'^$')
+    def all_images(self, request, *args, **kwargs):
+        return Page.serve(self, request, *args, **kwargs)
+
+    @route(r'^images/$')
+    def images_json(self, request, *args, **kwargs):
+        '''A JSON fragment of a single images page for infinite scroll'''
+        images = self.paginate_images(request)
+        urls = image_url_resolver(request)
+        urls.prefetch((image, specs) for image in images for specs in (ORIGINAL, THUMBNAIL))
+        data = {
+            'page': images.number,
+            'num_pages': images.paginator.num_pages,
+            'count': images.paginator.count,
+            'next': None,
+            'images': [{
+                'id': image.pk,
+                'title': image.title,
+                'details': image.details if self.show_details else None,
+                'url': urls.url(image, ORIGINAL),
+                'thumbnail': urls.url(image, THUMBNAIL),
+            } for image in images],
+        }
+        if images.has_next():
+            data['next'] = '{0}{1}?page={2}'.format(
+                self.get_url(request), self.reverse_subpage('images_json'), images.next_page_number()
+            )
+        return JsonResponse(data)
 
+    def get_images(self, request):
         # Be compatible with swappable image model
         model = get_image_model()
 
-        # Creating empty Queryset from Wagtail image model
-        return model.objects.filter(tags__in=tags).distinct()
+        # Read the materialized membership instead of joining on tags
+        return model.objects.filter(album_memberships__album=self).order_by('pk')
+
+    def get_images_ids(self):
+        '''Primary keys of the album images, without loading them'''
+        return AlbumMembership.objects.filter(album=self).values_list('image_id', flat=True)
 
     class Meta:
         verbose_name = _('Album')
@@ -169,43 +225,23 @@ class Album(Page):
     type_icon = 'fa-picture-o'
 
     def __jsonld__(self, context):
-        request = context['request']
-        data = {
-            '@type': 'ImageGallery',
-            '@id': self.full_url,
-            'url': self.full_url,
-            'name': self.seo_title or self.title,
-            'associatedMedia': []
-        }
-        if self.first_published_at:
-            # Prevent pre wagtail 1.11 pages to fail
-            date_modified = self.last_published_at or self.first_published_at
-            data.update({
-                'datePublished': self.first_published_at.isoformat(),
-                'dateModified': date_modified.isoformat(),
-            })
-        if self.image:
-            data['image'] = request.site.root_url + self.image.get_rendition('original').url
-
-        for image in self.get_images(request):
-            image = getattr(image, 'image', image)
-            media = {
-                '@type': 'ImageObject',
-                'name': image.title,
-                'contentUrl': get_image_url(image, 'original'),
-                'thumbnail': {
-                    '@type': 'ImageObject',
-                    'contentUrl': get_image_url(image, 'fill-300x300'),
-                    'width': 300,
-                    'height': 300,
-                }
-            }
-            if image.details:
-                media['description'] = image.details
-
-            data['associatedMedia'].append(media)
+        return albums_jsonld(context, [self])[0]
 
-        return data
+
+class AlbumMembership(models.Model):
+    '''
+    Materialized album to image membership resolved from tags.
+
+    Maintained on album and image tags changes,
+    it can be rebuilt with the ``rebuild_album_images`` command.
+    '''
+    album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='memberships')
+    image = models.ForeignKey(ImageModel, on_delete=models.CASCADE, related_name='album_memberships')
+
+    class Meta:
+        unique_together = (
+            ('album', 'image'),
+        )
 
 
 class ManualAlbumImage(Orderable, models.Model):
@@ -227,6 +263,15 @@ class ManualAlbum(Album):
     def get_images(self, request):
         return [i.image for i in self.images.all()]
 
+    def get_images_ids(self):
+        return self.images.values_list('image_id', flat=True)
+
+    def paginate_images(self, request):
+        qs = self.images.select_related('image')
+        _, images = paginate(request, qs, 'page', DEFAULT_PAGE_SIZE)
+        images.object_list = [i.image for i in images.object_list]
+        return images
+
     class Meta:
         verbose_name = _('Manual album')
 
@@ -0,0 +1,45 @@
+'''
+Album memberships maintenance and page cache purge signal handlers
+'''
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from taggit.models import TaggedItem
+from wagtail.wagtailimages import get_image_model
+
+from wapps import pagecache
+
+from . import membership
+from .models import album_key, AlbumMembership, AlbumTag, ManualAlbumImage
+
+
+@receiver(post_save, sender=AlbumTag)
+@receiver(post_delete, sender=AlbumTag)
+def on_album_tag_changed(sender, instance, **kwargs):
+    # Never create memberships while deleting (the album may be deleted)
+    membership.update_album(instance.content_object_id, add=kwargs['signal'] is post_save)
+    pagecache.purge(album_key(instance.content_object_id))
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def on_image_tag_changed(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(get_image_model()).pk:
+        membership.update_image(instance.object_id, add=kwargs['signal'] is post_save)
+        if settings.WAPPS_PAGE_CACHE:
+            # Albums gaining or losing the image
+            albums = AlbumTag.objects.filter(tag_id=instance.tag_id).values_list('content_object_id', flat=True)
+            pagecache.purge(*(album_key(pk) for pk in albums))
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(pre_delete, sender=get_image_model())
+def on_album_image_changed(sender, instance, **kwargs):
+    if not settings.WAPPS_PAGE_CACHE:
+        return
+    # Before deletion as memberships are then deleted
+    albums = set(AlbumMembership.objects.filter(image=instance).values_list('album_id', flat=True))
+    albums.update(ManualAlbumImage.objects.filter(image=instance).values_list('page_id', flat=True))
+    pagecache.purge(*(album_key(pk) for pk in albums))
@@ -0,0 +1,91 @@
+'''
+Cached, immutable site identity snapshots.
+
+A snapshot holds the identity settings values along with precomputed
+favicon and logo URLs, ``sameAs`` links and tags so rendering the page head
+doesn't cost any query.
+Snapshots are invalidated on identity, tags, referenced images and site changes.
+'''
+from django.db.models import Q
+
+from . import social
+from .cache import VersionedCache
+from .instrumentation import timed
+from .mixins import ContactFields, SocialFields
+from .models import IdentitySettings
+from .models.identity import select_favicon
+from .utils import get_image_url
+
+#: Favicon sizes used by the ``wapps/metadata.html`` template
+FAVICON_SIZES = (
+    (16, 16), (32, 32), (57, 57), (60, 60), (70, 70), (72, 72), (76, 76), (96, 96),
+    (114, 114), (120, 120), (128, 128), (144, 144), (150, 150), (152, 152), (196, 196),
+    (310, 150), (310, 310),
+)
+
+IMAGE_FIELDS = ('logo', 'amp_logo', 'favicon', 'favicon_large')
+
+cache = VersionedCache('identity')
+
+
+class IdentitySnapshot(object):
+    '''An immutable copy of a site identity with precomputed URLs'''
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Identity snapshots are immutable')
+
+    def favicon_url(self, width, height=None):
+        height = height or width
+        if (width, height) in self.favicon_urls:
+            return self.favicon_urls[(width, height)]
+        image = select_favicon(self, width)
+        if image:
+            return get_image_url(image, 'fill-{0}x{1}'.format(width, height))
+
+
+def build_snapshot(site):
+    # Like IdentitySettings.for_site() but fetching all referenced images at once
+    identity, _ = IdentitySettings.objects.select_related(*IMAGE_FIELDS).get_or_create(site=site)
+    attrs = dict(
+        (field.name, getattr(identity, field.name))
+        for field in SocialFields._meta.fields + ContactFields._meta.fields
+    )
+    attrs.update((name, getattr(identity, name)) for name in IMAGE_FIELDS)
+    attrs.update(
+        pk=identity.pk,
+        site_id=site.pk,
+        name=identity.name,
+        description=identity.description,
+        bg_color=identity.bg_color,
+        tags=tuple(t.name for t in identity.tags.all()),
+        logo_url=site.root_url + get_image_url(identity.logo, 'original') if identity.logo else None,
+        svg_logo_url=identity.svg_logo.url if identity.svg_logo else None,
+        same_as=tuple(
+            social.user_url(network, getattr(identity, network))
+            for network, conf in social.NETWORKS.items()
+            if getattr(identity, network, None) and 'url' in conf
+        ),
+    )
+    favicon_urls = {}
+    for width, height in FAVICON_SIZES:
+        image = select_favicon(identity, width)
+        if image:
+            favicon_urls[(width, height)] = get_image_url(image, 'fill-{0}x{1}'.format(width, height))
+    attrs['favicon_urls'] = favicon_urls
+    return IdentitySnapshot(**attrs)
+
+
+@timed('identity')
+def get_identity(site):
+    '''The cached identity snapshot of a site'''
+    return cache.get_or_set('snapshot', lambda: build_snapshot(site), scope=site.pk)
+
+
+def sites_using_image(image_id):
+    '''Sites whose identity references a given image'''
+    query = Q()
+    for name in IMAGE_FIELDS:
+        query |= Q(**{'{0}_id'.format(name): image_id})
+    return IdentitySettings.objects.filter(query).values_list('site_id', flat=True)
@@ -0,0 +1,159 @@
+'''
+Hot-path instrumentation.
+
+Helpers decorated with ``timed(name)`` are timed and counted
+while ``InstrumentationMiddleware`` (enabled by ``WAPPS_INSTRUMENTATION``) handles a request.
+Request timings are exposed as a ``Server-Timing`` header and a structured log line,
+and aggregated in-process for the stats endpoint.
+Streamed bodies are produced after the headers are sent: their cost is only part
+of the log line and the stats, not of the ``Server-Timing`` header.
+
+Durations are inclusive: a timed helper calling another one counts its time too.
+Outside of an instrumented request, a decorated helper costs a single thread-local lookup.
+'''
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+from functools import wraps
+
+log = logging.getLogger(__name__)
+
+HEADER = 'Server-Timing'
+
+_local = threading.local()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class Timings(object):
+    '''Calls counts and durations (in seconds) of a single request'''
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.metrics = OrderedDict()
+
+    def add(self, name, duration):
+        calls, total = self.metrics.get(name, (0, 0.))
+        self.metrics[name] = (calls + 1, total + duration)
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.start
+
+    def header(self, total):
+        '''The ``Server-Timing`` header value, durations in milliseconds'''
+        metrics = ['{0};dur={1:.2f};desc="{2} calls"'.format(name, duration * 1000, calls)
+                   for name, (calls, duration) in self.metrics.items()]
+        metrics.append('total;dur={0:.2f}'.format(total * 1000))
+        return ', '.join(metrics)
+
+
+def current():
+    '''The current request ``Timings``, ``None`` outside of an instrumented request'''
+    return getattr(_local, 'timings', None)
+
+
+def start():
+    _local.timings = Timings()
+    return _local.timings
+
+
+def stop():
+    _local.timings = None
+
+
+def timed(name):
+    '''Time and count the decorated function calls under ``name``'''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = getattr(_local, 'timings', None)
+            if timings is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name, iterable):
+    '''Time the production of all the items of ``iterable`` as a single ``name`` call'''
+    duration = 0.
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                duration += time.perf_counter() - started
+            yield item
+    finally:
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.add(name, duration)
+
+
+def stream(timings, content, done):
+    '''
+    Keep ``timings`` active while a streamed body is produced,
+    then call ``done()`` once it is fully sent.
+    '''
+    iterator = iter(content)
+    try:
+        while True:
+            _local.timings = timings
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _local.timings = None
+            yield chunk
+    finally:
+        done()
+
+
+def record(timings, total):
+    '''Aggregate a request timings into the process stats'''
+    with _stats_lock:
+        for name, (calls, duration) in list(timings.metrics.items()) + [('total', (1, total))]:
+            stat = _stats.setdefault(name, {'calls': 0, 'duration': 0., 'max': 0.})
+            stat['calls'] += calls
+            stat['duration'] += duration
+            stat['max'] = max(stat['max'], duration)
+
+
+def get_stats():
+    '''
+    The aggregated stats of this process.
+
+    ``total.calls`` is the instrumented requests count,
+    ``max`` is the longest per-request duration. Durations are in milliseconds.
+    '''
+    with _stats_lock:
+        return dict((name, {
+            'calls': stat['calls'],
+            'duration': round(stat['duration'] * 1000, 2),
+            'max': round(stat['max'] * 1000, 2),
+        }) for name, stat in _stats.items())
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+def log_request(request, response, timings, total):
+    '''Emit a single ``key=value`` line, with the raw metrics as ``extra``'''
+    metrics = ' '.join('{0}={1}/{2:.2f}'.format(name, calls, duration * 1000)
+                       for name, (calls, duration) in timings.metrics.items())
+    log.info('method=%s path=%s status=%s total=%.2f %s', request.method, request.path, response.status_code,
+             total * 1000, metrics, extra={'timings': dict(timings.metrics), 'total': total})
@@ -1,73 +1,76 @@
+from copy import deepcopy
+
 from django.conf import settings
-from wagtail.wagtailcore.models import Page
 
-from . import social
-from .models import IdentitySettings
+from .breadcrumbs import get_breadcrumbs
+from .cache import VersionedCache
+from .identity import get_identity
+from .instrumentation import timed
+from .menu import get_menu
 from .utils import get_image_url, get_site
 
+#: Per-site graph fragments only depending on the site, the identity and the menu
+cache = VersionedCache('jsonld')
+
 
 def website(context):
-    request = context['request']
-    site = get_site(request)
-    identity = IdentitySettings.for_site(site)
-    return {
-        "@type": "WebSite",
-        "name": site.site_name,
-        "alternateName": identity.description,
-        "keywords": ','.join(t.name for t in identity.tags.all()),
-        "url": site.root_url,
-    }
+    site = get_site(context['request'])
+    return deepcopy(site_fragments(site)['website'])
 
 
 def site_navigation(context):
-    return [{
-        "@type": "SiteNavigationElement",
-        "name": page.title,
-        "url": page.full_url
-    } for page in Page.objects.live().in_menu().filter(depth__lte=3)]
+    site = get_site(context['request'])
+    return deepcopy(site_fragments(site)['navigation'])
 
 
 def breadcrumb(context):
     if 'page' not in context:
         return
-    page = context['page']
-    elements = []
-    for parent in page.get_ancestors():
-        if parent.is_root():
-            continue
-        elements.append({
+    site = get_site(context['request'])
+    return {
+        "@type": "BreadcrumbList",
+        "itemListElement": [{
             "@type": "ListItem",
-            "position": len(elements) + 1,
+            "position": position,
             "item": {
-                "@id": parent.full_url,
-                "name": parent.title,
+                "@id": crumb.full_url,
+                "name": crumb.title,
             }
-        })
-    elements.append({
-        "@type": "ListItem",
-        "position": len(elements) + 1,
-        "item": {
-            "@id": page.full_url,
-            "name": page.title,
-        }
-    })
-    return {
-        "@type": "BreadcrumbList",
-        "itemListElement": elements
+        } for position, crumb in enumerate(get_breadcrumbs(context['page'], site), 1)]
     }
 
 
 def organization(context):
-    request = context['request']
-    site = get_site(request)
-    identity = IdentitySettings.for_site(site)
+    site = get_site(context['request'])
+    return deepcopy(site_fragments(site)['organization'])
+
+
+def build_website(site, identity):
+    return {
+        "@type": "WebSite",
+        "name": site.site_name,
+        "alternateName": identity.description,
+        "keywords": ','.join(identity.tags),
+        "url": site.root_url,
+    }
+
+
+def build_site_navigation(site):
+    return [{
+        "@type": "SiteNavigationElement",
+        "name": item.title,
+        "url": item.full_url
+    } for item in get_menu(site)]
+
+
+def build_organization(site, identity):
     org = {
         "@type": "Organization",
         "url": site.root_url,
         "name": identity.name,
     }
-    if identity.logo:
-        org['logo'] = site.root_url + get_image_url(identity.logo, 'original')
+    if identity.logo_url:
+        org['logo'] = identity.logo_url
     if identity.email:
         org['email'] = identity.email
     if identity.telephone:
@@ -83,14 +86,8 @@ def organization(context):
     if any(address.values()):
         org['address'] = dict((k, v) for k, v in address.items() if v)
 
-    same_as = []
-    for network in social.NETWORKS.keys():
-        username = getattr(identity, network, None)
-        if username and 'url' in social.NETWORKS[network]:
-            network_url = social.user_url(network, username)
-            same_as.append(network_url)
-    if same_as:
-        org['sameAs'] = same_as
+    if identity.same_as:
+        org['sameAs'] = list(identity.same_as)
 
     from_settings = getattr(settings, 'JSONLD_ORG', {})
     org.update(from_settings)
@@ -137,6 +134,22 @@ def image_object(context, img, width=None, height=None):
     return data
 
 
+def site_fragments(site):
+    '''
+    Build or fetch from cache the graph fragments which only depend on the site.
+
+    Those are invalidated on page tree changes and on identity or site changes.
+    '''
+    def build():
+        identity = get_identity(site)
+        return {
+            'website': build_website(site, identity),
+            'organization': build_organization(site, identity),
+            'navigation': build_site_navigation(site),
+        }
+    return cache.get_or_set('fragments', build, scope=site.pk)
+
+
 def add_to_graph(graph, data):
     if isinstance(data, dict):
         graph.append(data)
@@ -144,13 +157,15 @@ def add_to_graph(graph, data):
         graph.extend(data)
 
 
+@timed('jsonld.graph')
 def graph(context, *data):
+    fragments = deepcopy(site_fragments(get_site(context['request'])))
     graph = [
-        website(context),
+        fragments['website'],
     ]
     add_to_graph(graph, breadcrumb(context))
-    add_to_graph(graph, organization(context))
-    add_to_graph(graph, site_navigation(context))
+    add_to_graph(graph, fragments['organization'])
+    add_to_graph(graph, fragments['navigation'])
 
     for d in data:
         if d and hasattr(d, '__jsonld__'):
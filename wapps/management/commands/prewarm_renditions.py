@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from wagtail.wagtailimages import get_image_model
+
+from wapps import renditions
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate the renditions used by templates, feeds and JSON-LD'
+
+    def add_arguments(self, parser):
+        parser.add_argument('images', nargs='*', type=int, help='Only process these image IDs')
+        parser.add_argument('-c', '--concurrency', type=int, default=None,
+                            help='Number of worker processes (defaults to WAPPS_RENDITIONS_CONCURRENCY)')
+        parser.add_argument('-s', '--spec', dest='specs', action='append', default=None,
+                            help='Only generate this spec (can be repeated)')
+
+    def handle(self, *args, **options):
+        ids = options['images'] or list(get_image_model().objects.order_by('pk').values_list('pk', flat=True))
+        total = len(ids)
+        done = [0]
+
+        def progress(image_id, count):
+            done[0] += 1
+            if options['verbosity'] > 0:
+                self.stdout.write('[{0}/{1}] image {2}: {3} renditions'.format(done[0], total, image_id, count))
+
+        count = renditions.generate_many(ids, options['specs'], options['concurrency'], progress)
+        self.stdout.write('Generated {0} renditions for {1} images'.format(count, total))
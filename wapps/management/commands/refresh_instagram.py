@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from wapps.models import IdentitySettings
+from wapps.social import instagram
+
+
+class Command(BaseCommand):
+    help = 'Refresh Instagram feeds snapshots (defaults to all sites accounts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', help='Instagram users to refresh')
+
+    def handle(self, *args, **options):
+        # Identities may store either a username or a profile URL
+        users = options['users'] or set(
+            value.rstrip('/').rsplit('/', 1)[-1]
+            for value in IdentitySettings.objects.exclude(instagram='').values_list('instagram', flat=True)
+        )
+        for user in sorted(users):
+            snapshot = instagram.refresh(user)
+            if snapshot is None:
+                self.stdout.write('{0}: refresh failed or already running'.format(user))
+            else:
+                self.stdout.write('{0}: {1} items'.format(user, len(snapshot['items'])))
@@ -0,0 +1,77 @@
+'''
+Cached per-site menu tree.
+
+Menu pages are resolved once per site into compact tuples
+shared by the ``menu_items()`` template global and the JSON-LD site navigation.
+They are invalidated on page tree and sites changes.
+'''
+import hashlib
+
+from collections import namedtuple
+
+from wagtail.wagtailcore.models import Page, Site
+
+from .cache import VersionedCache
+from .utils import page_url_parts
+
+#: A resolved menu entry, ``url`` is relative when the page belongs to the menu site.
+#: ``children`` are the next level menu pages, displayed as dropdowns.
+MenuItem = namedtuple('MenuItem', ('pk', 'title', 'seo_title', 'url', 'full_url', 'depth', 'path', 'children'))
+
+#: Deepest top-level menu pages
+MAX_DEPTH = 3
+
+cache = VersionedCache('menu')
+
+SIGNATURE_KEY = 'wapps:menu:signature'
+
+
+def menu_pages():
+    return Page.objects.live().in_menu().filter(depth__lte=MAX_DEPTH + 1)
+
+
+def build_menu(site):
+    '''Resolve the menu pages and their children for a given site in a single query'''
+    pages = menu_pages().order_by('-path')
+    root_paths = Site.get_site_root_paths()
+    items = []
+    children = {}
+    fields = ('pk', 'title', 'seo_title', 'url_path', 'depth', 'path')
+    # Deepest first so children are resolved before their parent
+    for pk, title, seo_title, url_path, depth, path in pages.values_list(*fields):
+        parts = page_url_parts(url_path, root_paths)
+        if parts is None:
+            # Page is not routable from any site
+            continue
+        site_id, root_url, page_path = parts
+        url = page_path if site_id == site.pk else root_url + page_path
+        item = MenuItem(pk, title, seo_title, url, root_url + page_path, depth, path,
+                        tuple(reversed(children.pop(path, []))))
+        if depth > MAX_DEPTH:
+            children.setdefault(path[:-Page.steplen], []).append(item)
+        else:
+            items.append(item)
+    return tuple(reversed(items))
+
+
+def get_menu(site):
+    '''The cached menu tree of a site'''
+    return cache.get_or_set('items', lambda: build_menu(site), scope=site.pk)
+
+
+def signature():
+    '''A digest of the rendered fields of every menu page, whatever the site'''
+    values = menu_pages().order_by('path').values_list('pk', 'title', 'seo_title', 'url_path')
+    return hashlib.md5(repr(list(values)).encode('utf-8')).hexdigest()
+
+
+def has_changed():
+    '''
+    Whether the menu pages changed since the previous call.
+
+    A missing previous signature (first call, evicted key) counts as a change.
+    '''
+    current = signature()
+    previous = cache.backend.get(SIGNATURE_KEY)
+    cache.backend.set(SIGNATURE_KEY, current, None)
+    return previous != current
@@ -1,6 +1,7 @@
 from django.utils.html import strip_tags
 
-from .models import IdentitySettings
+from .identity import get_identity
+from .instrumentation import timed
 from .utils import get_image_url, get_site
 
 
@@ -14,9 +15,10 @@ class Metadata(object):
         self.request = kwargs.get('request', None) or context.get('request', None)
         self.page = kwargs.get('page', None) or context.get('page', None)
         self.site = kwargs.get('site', None) or get_site(self.request)
-        self.identity = IdentitySettings.for_site(self.site)
+        self.identity = get_identity(self.site)
 
     @property
+    @timed('metadata.title')
     def title(self):
         if self.kwargs.get('title'):
             return self.kwargs['title']
@@ -24,10 +26,12 @@ class Metadata(object):
             return self.page.seo_title or self.page.title
 
     @property
+    @timed('metadata.site_title')
     def site_title(self):
         return self.identity.name or self.context.get('WAGTAIL_SITE_NAME')
 
     @property
+    @timed('metadata.full_title')
     def full_title(self):
         if self.site_title and self.title:
             return ' | '.join((self.title, self.site_title))
@@ -37,6 +41,7 @@ class Metadata(object):
             return self.title
 
     @property
+    @timed('metadata.description')
     def description(self):
         if self.kwargs.get('description'):
             return self.kwargs['description']
@@ -52,6 +57,7 @@ class Metadata(object):
             return self.identity.description
 
     @property
+    @timed('metadata.image')
     def image(self):
         if self.kwargs.get('image'):
             return self.kwargs['image']
@@ -63,6 +69,7 @@ class Metadata(object):
             return self.identity.logo
 
     @property
+    @timed('metadata.image_url')
     def image_url(self):
         if self.kwargs.get('image_url'):
             return self.kwargs['image_url']
@@ -70,8 +77,9 @@ class Metadata(object):
             return self.site.root_url + get_image_url(self.image, 'original')
 
     @property
+    @timed('metadata.tags')
     def tags(self):
-        tags = set(t.name for t in self.identity.tags.all())
+        tags = set(self.identity.tags)
         if self.kwargs.get('tags'):
             tags.update(self.kwargs['tags'])
         if getattr(self.page, 'tags', None):
@@ -1,26 +1,109 @@
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.middleware.locale import LocaleMiddleware
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
 
+from . import instrumentation
 from .errors import HttpResponseError
 
 
+def request_language(request):
+    '''Negotiate the language from the request like Django's ``LocaleMiddleware``'''
+    return translation.get_language_from_request(request)
+
+
+def default_language(request):
+    '''Always use ``settings.LANGUAGE_CODE``'''
+    return settings.LANGUAGE_CODE
+
+
+#: Built-in locale strategies, any other value is the dotted path
+#: to a callable taking the request and returning a language code.
+LOCALE_STRATEGIES = {
+    'request': request_language,
+    'default': default_language,
+}
+
+
+class PathMatcher(object):
+    '''
+    Match a path against many prefixes with a single compiled regex.
+
+    Longest prefixes win and unmatched paths return ``None``.
+    Most paths are rejected by a set lookup on their head
+    (as many characters as the shortest prefix) before reaching the regex.
+    '''
+    def __init__(self, prefixes):
+        prefixes = sorted(prefixes.items(), key=lambda p: len(p[0]), reverse=True)
+        self.values = [value for _, value in prefixes]
+        self.head = min(len(prefix) for prefix, _ in prefixes) if prefixes else 0
+        self.heads = frozenset(prefix[:self.head] for prefix, _ in prefixes)
+        pattern = '|'.join('(?P<p{0}>{1})'.format(i, re.escape(prefix)) for i, (prefix, _) in enumerate(prefixes))
+        self.regex = re.compile(pattern)
+
+    def match(self, path):
+        if path[:self.head] not in self.heads:
+            return None
+        match = self.regex.match(path)
+        if match:
+            return self.values[int(match.lastgroup[1:])]
+
+
 class AdminLocaleMiddleware(LocaleMiddleware):
-    ALLOWED_PATHS = [
-        '/admin',
-    ]
+    '''
+    Only activate a locale for the ``WAPPS_LOCALE_PATHS`` prefixes,
+    each one with its own strategy (see ``LOCALE_STRATEGIES``).
+    '''
+    def __init__(self, get_response=None):
+        super(AdminLocaleMiddleware, self).__init__(get_response)
+        self.matcher = PathMatcher(dict(
+            (prefix, LOCALE_STRATEGIES[strategy] if strategy in LOCALE_STRATEGIES else import_string(strategy))
+            for prefix, strategy in settings.WAPPS_LOCALE_PATHS.items()
+        ))
 
     def process_request(self, request):
-        if any(request.path.startswith(p) for p in self.ALLOWED_PATHS):
+        strategy = self.matcher.match(request.path)
+        if strategy is None:
+            return
+        if strategy is request_language:
+            # Keep the i18n patterns handling
             return super(AdminLocaleMiddleware, self).process_request(request)
+        translation.activate(strategy(request))
+        request.LANGUAGE_CODE = translation.get_language()
 
 
 class FirstVisitMiddleware(object):
+    '''
+    Expose a lazy ``request.first_visit`` flag backed by a signed cookie.
+
+    Neither the session nor the user are touched unless the flag is read,
+    and the cookie is only set on the first response having read it.
+    '''
+    SALT = 'wapps.first_visit'
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        request.session['first_visit'] = not (request.session.get('visited', False) or request.user.is_authenticated())
+        state = {}
+
+        def is_first_visit():
+            visited = request.get_signed_cookie(settings.WAPPS_FIRST_VISIT_COOKIE, False, salt=self.SALT)
+            state['first_visit'] = not (visited or request.user.is_authenticated)
+            return state['first_visit']
+
+        request.first_visit = SimpleLazyObject(is_first_visit)
         response = self.get_response(request)
-        request.session['visited'] = True
+        if 'first_visit' in state:
+            patch_vary_headers(response, ('Cookie',))
+            if state['first_visit']:
+                response.set_signed_cookie(settings.WAPPS_FIRST_VISIT_COOKIE, '1', salt=self.SALT,
+                                           max_age=settings.WAPPS_FIRST_VISIT_MAX_AGE, httponly=True)
         return response
 
 
@@ -34,3 +117,39 @@ class ErrorMiddleware(object):
     def process_exception(self, request, ex):
         if isinstance(ex, HttpResponseError):
             return ex.response
+
+
+class InstrumentationMiddleware(object):
+    '''
+    Time the ``wapps.instrumentation`` hot paths of each request.
+
+    Only loaded when ``WAPPS_INSTRUMENTATION`` is enabled,
+    it should be the first middleware to measure the whole request.
+    '''
+    def __init__(self, get_response):
+        if not settings.WAPPS_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop()
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user and user.is_staff):
+            # Internals are only disclosed to staff members, like the stats endpoint
+            response[instrumentation.HEADER] = timings.header(timings.duration)
+        if response.streaming:
+            response.streaming_content = instrumentation.stream(
+                timings, response.streaming_content, lambda: self.done(request, response, timings)
+            )
+        else:
+            self.done(request, response, timings)
+        return response
+
+    def done(self, request, response, timings):
+        total = timings.duration
+        instrumentation.record(timings, total)
+        instrumentation.log_request(request, response, timings, total)
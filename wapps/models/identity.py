@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
 from taggit.managers import TaggableManager
@@ -10,7 +11,17 @@ from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 from colorful.fields import RGBColorField
 
 from wapps.mixins import SocialFields, ContactFields
-from wapps.utils import mark_safe_lazy, get_image_model, get_image_url
+from wapps.utils import mark_safe_lazy, get_image_model, ImageURLResolver
+
+
+def select_favicon(identity, width):
+    '''Select the best image to render a favicon of a given width'''
+    if identity.favicon and identity.favicon.width >= width:
+        return identity.favicon
+    elif identity.favicon_large:
+        return identity.favicon_large
+    elif identity.logo:
+        return identity.logo
 
 
 @register_setting(icon='fa-universal-access')
@@ -86,15 +97,14 @@ class IdentitySettings(SocialFields, ContactFields, BaseSetting):
         MultiFieldPanel(ContactFields.panels, heading=_('Contact'), classname='collapsible'),
     ]
 
+    @cached_property
+    def image_urls(self):
+        '''Memoize image URLs as templates request the same favicons many times'''
+        return ImageURLResolver()
+
     def favicon_url(self, width, height=None):
         height = height or width
         specs = 'fill-{width}x{height}'.format(width=width, height=height)
-        if self.favicon and self.favicon.width >= width:
-            image = self.favicon
-        elif self.favicon_large:
-            image = self.favicon_large
-        elif self.logo:
-            image = self.logo
-        else:
-            return
-        return get_image_url(image, specs)
+        image = select_favicon(self, width)
+        if image:
+            return self.image_urls.url(image, specs)
@@ -3,6 +3,8 @@ from django.utils.translation import ugettext_lazy as _
 
 from wagtail.wagtailimages.models import Image, AbstractImage, AbstractRendition
 
+from wapps.instrumentation import timed
+
 
 class WappsImage(AbstractImage):
     credit = models.CharField(_('Credit'), max_length=255, blank=True)
@@ -15,6 +17,11 @@ class WappsImage(AbstractImage):
         'details',
     )
 
+    @timed('renditions.get')
+    def get_rendition(self, filter):
+        # Missing renditions are generated synchronously
+        return super(WappsImage, self).get_rendition(filter)
+
 
 class WappsRendition(AbstractRendition):
     image = models.ForeignKey(WappsImage, related_name='renditions')
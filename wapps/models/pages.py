@@ -13,6 +13,7 @@ from wagtail.wagtailcore.fields import RichTextField
 from wagtail.wagtailcore.models import Page
 from wagtail.wagtailimages.edit_handlers import ImageChooserPanel
 
+from wapps.pagecache import CachedPageMixin
 from wapps.utils import get_image_model, get_site
 
 
@@ -20,7 +21,7 @@ class StaticPageTag(TaggedItemBase):
     content_object = ParentalKey('wapps.StaticPage', related_name='tagged_items')
 
 
-class StaticPage(Page):
+class StaticPage(CachedPageMixin, Page):
     intro = models.TextField(_('Introduction'), blank=True, null=True,
                              help_text=_('An optional introduction used as page heading and summary'))
     body = RichTextField(_('Body'),
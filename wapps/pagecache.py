@@ -0,0 +1,197 @@
+'''
+Opt-in whole page responses cache.
+
+When ``WAPPS_PAGE_CACHE`` is enabled, anonymous responses of pages using
+``CachedPageMixin`` are stored in the shared cache (``WAPPS_CACHE`` alias),
+keyed by site, path, language and the query parameters the page uses.
+
+Each response is tagged with surrogate keys (page, blog, identity, menu, images...)
+exposed in the ``Surrogate-Key`` header.
+Purging a key goes through all the ``WAPPS_PAGE_CACHE_PURGE_BACKENDS``:
+the local backend bumps the key version (a ``VersionedCache`` scope) so every matching response becomes stale,
+the HTTP backend forwards the purge to a front cache.
+'''
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.http import urlencode
+from django.utils.module_loading import import_string
+
+from wagtail.wagtailcore.models import Page
+
+from .cache import VersionedCache
+from .social import http
+from .utils import get_site
+
+log = logging.getLogger(__name__)
+
+#: Every cached page carries this key, purge it to flush all pages
+ALL = 'pages'
+MENU = 'menu'
+
+HEADER = 'Surrogate-Key'
+
+#: Surrogate keys versions, each key being a scope
+keys_cache = VersionedCache('pagecache')
+
+#: Query parameters changing the rendered pages, any other one shares the same entry
+QUERY_PARAMS = ('after', 'before', 'page', 'q')
+
+
+def page_key(pk):
+    return 'page-{0}'.format(pk)
+
+
+def identity_key(site_id):
+    return 'identity-{0}'.format(site_id)
+
+
+def image_key(pk):
+    return 'image-{0}'.format(pk)
+
+
+def store():
+    return caches[settings.WAPPS_CACHE]
+
+
+def versions(keys):
+    '''Current versions of some surrogate keys in a single cache round-trip'''
+    return keys_cache.scopes_versions(keys)
+
+
+def response_key(request, params=QUERY_PARAMS):
+    site = get_site(request)
+    query = urlencode(sorted((name, request.GET.getlist(name)) for name in params if name in request.GET), doseq=True)
+    parts = (site.pk, translation.get_language(), request.path, query)
+    digest = hashlib.md5(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return 'wapps:pagecache:page:{0}'.format(digest)
+
+
+def get_response(request, params=QUERY_PARAMS):
+    '''A cached response if any and none of its surrogate keys has been purged'''
+    entry = store().get(response_key(request, params))
+    if entry is None or versions(entry['keys']) != entry['versions']:
+        return None
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers']:
+        response[name] = value
+    return response
+
+
+def set_response(request, response, keys, keys_versions, params=QUERY_PARAMS):
+    entry = {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': list(response.items()),
+        'keys': keys,
+        'versions': keys_versions,
+    }
+    store().set(response_key(request, params), entry, settings.WAPPS_PAGE_CACHE_TIMEOUT)
+
+
+class PurgeBackend(object):
+    '''Base class for purge backends'''
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class LocalPurgeBackend(PurgeBackend):
+    '''Purge responses stored in the shared Django cache'''
+    def purge(self, keys):
+        for key in keys:
+            keys_cache.invalidate(key)
+
+
+class HTTPPurgeBackend(PurgeBackend):
+    '''
+    Send a ``PURGE`` request listing the keys to ``WAPPS_PAGE_CACHE_PURGE_URL``.
+
+    Failures are logged and never raised.
+    '''
+    method = 'PURGE'
+    header = HEADER
+
+    def purge(self, keys):
+        url = settings.WAPPS_PAGE_CACHE_PURGE_URL
+        try:
+            response = http.get_client().request(self.method, url, headers={self.header: ' '.join(keys)},
+                                                 timeout=settings.WAPPS_PAGE_CACHE_PURGE_TIMEOUT)
+            response.raise_for_status()
+        except Exception as e:
+            log.warning('Unable to purge %s from %s: %s', keys, url, e)
+
+
+def get_backends():
+    return [import_string(path)() for path in settings.WAPPS_PAGE_CACHE_PURGE_BACKENDS]
+
+
+def purge(*keys):
+    '''Purge all responses tagged with any of the given surrogate keys'''
+    keys = [key for key in keys if key]
+    if not settings.WAPPS_PAGE_CACHE or not keys:
+        return
+    for backend in get_backends():
+        backend.purge(keys)
+
+
+def is_cacheable(request):
+    if request.method not in ('GET', 'HEAD') or getattr(request, 'is_preview', False):
+        return False
+    user = getattr(request, 'user', None)
+    return not (user and user.is_authenticated)
+
+
+class CachedPageMixin(object):
+    '''
+    Cache the rendered responses of a page for anonymous visitors.
+
+    Responses are tagged with the page and its ancestors keys (breadcrumbs display their titles),
+    override ``get_cache_keys()`` to tag them with extra surrogate keys.
+    Extend ``cache_query_params`` if the page renders other query parameters.
+    List in ``uncached_routes`` the ``RoutablePageMixin`` views names never to cache
+    (feeds, JSON fragments...): they are served as is.
+    '''
+    cache_query_params = QUERY_PARAMS
+    uncached_routes = ()
+
+    def is_cached_route(self, *args, **kwargs):
+        # RoutablePageMixin.serve() receives the resolved view as first argument
+        view = args[0] if args else kwargs.get('view')
+        return view is None or view.__name__ not in self.uncached_routes
+
+    def get_cache_keys(self, request):
+        site = get_site(request)
+        ancestors = Page.objects.ancestor_of(self).filter(depth__gt=1).values_list('pk', flat=True)
+        keys = [ALL, MENU, page_key(self.pk), identity_key(site.pk)]
+        keys.extend(page_key(pk) for pk in ancestors)
+        for attr in ('image_id', 'feed_image_id'):
+            if getattr(self, attr, None):
+                keys.append(image_key(getattr(self, attr)))
+        return keys
+
+    def serve(self, request, *args, **kwargs):
+        if not settings.WAPPS_PAGE_CACHE or not is_cacheable(request) or not self.is_cached_route(*args, **kwargs):
+            return super(CachedPageMixin, self).serve(request, *args, **kwargs)
+
+        response = get_response(request, self.cache_query_params)
+        if response is not None:
+            response['X-Page-Cache'] = 'hit'
+            return response
+
+        keys = self.get_cache_keys(request)
+        # Fetched before rendering so a concurrent purge is never missed
+        keys_versions = versions(keys)
+        response = super(CachedPageMixin, self).serve(request, *args, **kwargs)
+        if getattr(response, 'streaming', False) or response.status_code != 200:
+            return response
+        if hasattr(response, 'render'):
+            response.render()
+        response[HEADER] = ' '.join(keys)
+        if request.method == 'GET' and not response.cookies and not request.META.get('CSRF_COOKIE_USED'):
+            set_response(request, response, keys, keys_versions, self.cache_query_params)
+        response['X-Page-Cache'] = 'miss'
+        return response
@@ -0,0 +1,128 @@
+'''
+Keyset (seek) pagination.
+
+Pages are addressed by an opaque ``(date, pk)`` cursor instead of an offset,
+so deep pages cost as much as the first one and no ``COUNT`` query is required.
+'''
+import hashlib
+
+from calendar import timegm
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .cache import VersionedCache
+
+#: Approximate listing counts, scoped by their owner (ie. ``blog:<pk>``)
+counts_cache = VersionedCache('counts')
+
+
+def make_cursor(date, pk):
+    '''An opaque ``(date, pk)`` cursor'''
+    micros = timegm(date.utctimetuple()) * 10 ** 6 + date.microsecond
+    return '{0}-{1}'.format(micros, pk)
+
+
+def parse_cursor(cursor):
+    '''Parse a cursor into a ``(date, pk)`` tuple, raise ``ValueError`` or ``OverflowError`` if invalid'''
+    micros, pk = cursor.split('-')
+    seconds, micros = divmod(int(micros), 10 ** 6)
+    date = datetime.utcfromtimestamp(seconds).replace(microsecond=micros, tzinfo=timezone.utc)
+    return date, int(pk)
+
+
+def cached_count(queryset, scope=None):
+    '''
+    A callable returning the cached count of a queryset.
+
+    The count is only approximate: it is refreshed when its scope is invalidated
+    or after ``WAPPS_CACHE_TIMEOUT``.
+    '''
+    key = hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+    return lambda: counts_cache.get_or_set(key, queryset.count, scope=scope)
+
+
+class KeysetPage(object):
+    '''
+    A page of results with cursors to its neighbours.
+
+    ``next`` points to older items and ``previous`` to newer ones.
+    '''
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._count = count
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @cached_property
+    def count(self):
+        '''The (approximate) total count if a counter has been given'''
+        return self._count() if self._count else None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __contains__(self, item):
+        return item in self.object_list
+
+
+def paginate(request, queryset, per_page, field='date', count=None):
+    '''
+    Paginate a queryset by descending ``(field, pk)`` given a datetime ``field``.
+
+    Older pages are requested with ``?after=<cursor>``, newer ones with ``?before=<cursor>``.
+    ``count`` is an optional callable evaluated only if the page count is accessed.
+    Raises ``Http404`` on invalid cursors.
+    '''
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    try:
+        cursor = parse_cursor(before or after) if before or after else None
+    except (ValueError, OverflowError, OSError):
+        raise Http404('Invalid page cursor')
+
+    def key(item):
+        return make_cursor(getattr(item, field), item.pk)
+
+    if before:
+        date, pk = cursor
+        qs = queryset.filter(Q(**{field + '__gt': date}) | Q(**{field: date, 'pk__gt': pk}))
+        items = list(qs.order_by(field, 'pk')[:per_page + 1])
+        if len(items) > per_page:
+            items = items[:per_page][::-1]
+            return KeysetPage(items, key(items[-1]), key(items[0]), count)
+        # Back to the newest items: serve the head page instead
+        after = None
+        cursor = None
+
+    qs = queryset.order_by('-' + field, '-pk')
+    if cursor:
+        date, pk = cursor
+        qs = qs.filter(Q(**{field + '__lt': date}) | Q(**{field: date, 'pk__lt': pk}))
+    items = list(qs[:per_page + 1])
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    return KeysetPage(
+        items,
+        key(items[-1]) if has_next else None,
+        key(items[0]) if after and items else None,
+        count,
+    )
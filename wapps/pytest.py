@@ -1,14 +1,23 @@
+import json
+import threading
+import time
+
 import pytest
 
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 from urllib.parse import urljoin, urlsplit
 
 from django.conf import settings
 from django.core.management import call_command
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.http import QueryDict
 from django.http.request import split_domain_port, validate_host
 from django.middleware import csrf
 from django.template import RequestContext, engines
+from django.test.utils import CaptureQueriesContext
 from django.utils.encoding import smart_text
 from django.utils.functional import SimpleLazyObject
 from django.utils.text import slugify
@@ -45,6 +54,17 @@ def _wagtail_cleanup(request, django_db_blocker, _django_db_marker):
                 call_command('loaddata', marker.args[0])
 
 
+@pytest.fixture(autouse=True)
+def _wapps_cache_cleanup():
+    '''Ensure each test starts with empty wapps caches'''
+    from django.core.cache import caches
+    from wapps.cache import clear_local_caches
+    caches[settings.WAPPS_CACHE].clear()
+    clear_local_caches()
+    yield
+    clear_local_caches()
+
+
 @pytest.fixture
 def preview(admin_client, site):
     __tracebackhide__ = True
@@ -88,7 +108,7 @@ def render_jinja_template(template, **ctx):
     from wapps import factories
     engine = engines['jinja2']
     template = engine.from_string(template)
-    request = ctx.get('request', factories.RequestFactory().get('/'))
+    request = ctx.get('request') or factories.RequestFactory().get('/')
     context = RequestContext(request, ctx)
     return template.render(context)
 
@@ -97,7 +117,7 @@ def get_jinja_context(**ctx):
     '''Generate a jinja context like django-jinja'''
     from wapps import factories
     engine = engines['jinja2']
-    request = ctx.get('request', factories.RequestFactory().get('/'))
+    request = ctx.get('request') or factories.RequestFactory().get('/')
     context = dict_from_context(ctx)
 
     def _get_val():
@@ -127,6 +147,74 @@ def jinja_context():
     return get_jinja_context
 
 
+class FakeServer(ThreadingMixIn, HTTPServer):
+    '''
+    A local HTTP server replying to any request with ``body``.
+
+    Queued ``statuses`` are used first, then ``status``.
+    Requests are recorded in ``requests`` as ``(method, path, headers)`` tuples.
+    '''
+    daemon_threads = True
+
+    def __init__(self):
+        super(FakeServer, self).__init__(('127.0.0.1', 0), FakeHandler)
+        self.status = 200
+        self.statuses = []
+        self.body = b'ok'
+        self.content_type = None
+        self.delay = 0
+        self.hits = 0
+        self.requests = []
+        self.connections = set()
+
+    @property
+    def host(self):
+        return '127.0.0.1:{0}'.format(self.server_port)
+
+    @property
+    def url(self):
+        return 'http://{0}/'.format(self.host)
+
+    def json(self, data):
+        '''Reply with ``data`` serialized as JSON'''
+        self.body = json.dumps(data).encode('utf-8')
+        self.content_type = 'application/json'
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self):
+        server = self.server
+        server.hits += 1
+        server.requests.append((self.command, self.path, self.headers))
+        server.connections.add(self.client_address)
+        time.sleep(server.delay)
+        self.send_response(server.statuses.pop(0) if server.statuses else server.status)
+        if server.content_type:
+            self.send_header('Content-Type', server.content_type)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    do_GET = do_POST = do_PURGE = reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    '''A running ``FakeServer``'''
+    server = FakeServer()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 def _error(msg, *args, **kwargs):
     '''A simple wrapper to str.format allowing cleaner line wrapping'''
     return msg.format(*args, **kwargs)
@@ -207,6 +295,22 @@ def assert_redirects(response, expected_url, status_code=302,
     assert url == expected_url, 'Response redirected to "{0}", expected "{1}"'.foramt(url, expected_url)
 
 
+@contextmanager
+def assert_num_queries(expected, using=None):
+    '''
+    Assert that the wrapped block executes exactly ``expected`` queries.
+    '''
+    __tracebackhide__ = True
+    context = CaptureQueriesContext(using or connection)
+    with context:
+        yield context
+    executed = len(context.captured_queries)
+    assert executed == expected, _error(
+        '{0} queries executed, {1} expected:\n{2}',
+        executed, expected, '\n'.join(q['sql'] for q in context.captured_queries)
+    )
+
+
 def _can_create_at(parent_model, child_model):
     __tracebackhide__ = True
     return child_model in parent_model.allowed_subpage_models()
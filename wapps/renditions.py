@@ -0,0 +1,123 @@
+'''
+Renditions pre-generation.
+
+Renditions used by templates, feeds and JSON-LD are generated ahead of time
+so the first visitor does not pay for their synchronous generation.
+'''
+import logging
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+
+from wagtail.wagtailimages import get_image_model
+
+from .image_formats import FORMATS
+
+log = logging.getLogger(__name__)
+
+#: Specs used by wapps templates, feeds and JSON-LD
+SPECS = (
+    'original',
+    'fill-300x300',  # Gallery JSON-LD thumbnails
+    'fill-400x380',  # Gallery and album thumbnails
+    'fill-1100x580',  # Page header images
+    'width-1100',  # Full page header images
+    'fill-1200x630',  # OpenGraph
+    'fill-1024x512',  # Twitter card
+    'fill-1920x1080',  # Feeds
+)
+
+_executor = None
+
+
+def get_specs():
+    '''All the specs to pre-generate, including image formats and ``WAPPS_RENDITIONS_SPECS``'''
+    specs = list(SPECS)
+    specs.extend(spec for _, _, spec in FORMATS.values())
+    specs.extend(settings.WAPPS_RENDITIONS_SPECS)
+    # Deduplicate while preserving order
+    return tuple(sorted(set(specs), key=specs.index))
+
+
+def generate(image_id, specs=None):
+    '''
+    Generate all missing renditions for a single image.
+
+    Returns the number of renditions processed.
+    '''
+    model = get_image_model()
+    try:
+        image = model.objects.get(pk=image_id)
+    except model.DoesNotExist:
+        return 0
+    count = 0
+    for spec in specs or get_specs():
+        try:
+            image.get_rendition(spec)
+        except Exception:  # A broken source file should not stop the batch
+            log.exception('Unable to generate rendition %s for image %s', spec, image_id)
+        else:
+            count += 1
+    return count
+
+
+def generate_many(image_ids, specs=None, concurrency=None, callback=None):
+    '''
+    Generate renditions for many images using a process pool.
+
+    ``callback(image_id, count)`` is called each time an image is done.
+    With a ``concurrency`` of 1 or less, images are processed in-process.
+    '''
+    specs = tuple(specs or get_specs())
+    concurrency = settings.WAPPS_RENDITIONS_CONCURRENCY if concurrency is None else concurrency
+    total = 0
+    if concurrency <= 1:
+        for image_id in image_ids:
+            count = generate(image_id, specs)
+            total += count
+            if callback:
+                callback(image_id, count)
+        return total
+
+    # Forked workers must not share the parent database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(generate, image_id, specs): image_id for image_id in image_ids}
+        for future in as_completed(futures):
+            count = future.result()
+            total += count
+            if callback:
+                callback(futures[future], count)
+    return total
+
+
+def page_images_ids(page):
+    '''Primary keys of the images displayed by a page'''
+    ids = set()
+    for attr in ('image_id', 'feed_image_id'):
+        if getattr(page, attr, None):
+            ids.add(getattr(page, attr))
+    if hasattr(page, 'get_images_ids'):
+        ids.update(page.get_images_ids())
+    return ids
+
+
+def prewarm(image_ids):
+    '''Generate renditions in the background without blocking the current request'''
+    global _executor
+    if not image_ids:
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.WAPPS_RENDITIONS_CONCURRENCY)
+    for image_id in image_ids:
+        _executor.submit(_prewarm_one, image_id)
+
+
+def _prewarm_one(image_id):
+    try:
+        return generate(image_id)
+    finally:
+        # Threads own their own connections
+        connections.close_all()
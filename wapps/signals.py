@@ -0,0 +1,121 @@
+'''
+Cache invalidation, page cache purge and renditions pre-generation signal handlers
+'''
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from wagtail.wagtailcore.models import Page, Site
+from wagtail.wagtailcore.signals import page_published, page_unpublished
+from wagtail.wagtailimages import get_image_model
+
+from . import breadcrumbs, identity, jsonld, menu, pagecache, renditions, utils, views
+from .feed import feeds_cache
+from .models import IdentitySettings
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def on_page_publication(sender, instance, **kwargs):
+    jsonld.cache.invalidate()
+    menu.cache.invalidate()
+    breadcrumbs.cache.invalidate()
+    if settings.WAPPS_PAGE_CACHE:
+        # The parent page may list its children
+        parent = Page.objects.filter(path=instance.path[:-instance.steplen]).values_list('pk', flat=True).first()
+        # Pages too deep to be listed can't change the menus
+        menu_changed = instance.depth <= menu.MAX_DEPTH + 1 and menu.has_changed()
+        pagecache.purge(
+            pagecache.page_key(instance.pk),
+            parent and pagecache.page_key(parent),
+            # Also covers pages removed from the menus
+            menu_changed and pagecache.MENU,
+        )
+
+
+@receiver(post_save, sender=Page)
+def on_page_moved(sender, instance, created, **kwargs):
+    # Page.move() saves a fresh non-specific Page instance
+    if not created:
+        jsonld.cache.invalidate()
+        menu.cache.invalidate()
+        breadcrumbs.cache.invalidate()
+        feeds_cache.invalidate()
+        # URLs may have changed anywhere
+        pagecache.purge(pagecache.ALL)
+
+
+@receiver(post_delete)
+def on_page_deleted(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        jsonld.cache.invalidate()
+        menu.cache.invalidate()
+        breadcrumbs.cache.invalidate()
+        feeds_cache.invalidate()
+        # URLs may have changed anywhere
+        pagecache.purge(pagecache.ALL)
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def on_site_changed(sender, instance, **kwargs):
+    utils.sites_cache.invalidate()
+    identity.cache.invalidate(instance.pk)
+    jsonld.cache.invalidate(instance.pk)
+    menu.cache.invalidate()
+    breadcrumbs.cache.invalidate()
+    feeds_cache.invalidate()
+    pagecache.purge(pagecache.ALL)
+
+
+@receiver(post_save, sender=IdentitySettings)
+@receiver(post_delete, sender=IdentitySettings)
+def on_identity_saved(sender, instance, **kwargs):
+    identity.cache.invalidate(instance.site_id)
+    jsonld.cache.invalidate(instance.site_id)
+    feeds_cache.invalidate()
+    pagecache.purge(pagecache.identity_key(instance.site_id))
+
+
+@receiver(m2m_changed, sender=IdentitySettings.tags.through)
+def on_identity_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, IdentitySettings) and action.startswith('post_'):
+        identity.cache.invalidate(instance.site_id)
+        jsonld.cache.invalidate(instance.site_id)
+        pagecache.purge(pagecache.identity_key(instance.site_id))
+
+
+@receiver(post_save, sender=get_image_model())
+def on_image_uploaded(sender, instance, created, **kwargs):
+    if created and settings.WAPPS_RENDITIONS_PREWARM:
+        transaction.on_commit(lambda: renditions.prewarm([instance.pk]))
+
+
+@receiver(page_published)
+def on_page_published(sender, instance, **kwargs):
+    if settings.WAPPS_RENDITIONS_PREWARM:
+        ids = renditions.page_images_ids(instance)
+        transaction.on_commit(lambda: renditions.prewarm(ids))
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def on_image_changed(sender, instance, **kwargs):
+    views.renditions_cache.invalidate(instance.pk)
+    pagecache.purge(pagecache.image_key(instance.pk))
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(pre_delete, sender=get_image_model())
+def on_identity_image_changed(sender, instance, **kwargs):
+    # Before deletion as references are then set to NULL
+    for site_id in identity.sites_using_image(instance.pk):
+        identity.cache.invalidate(site_id)
+        jsonld.cache.invalidate(site_id)
+        pagecache.purge(pagecache.identity_key(site_id))
+
+
+@receiver(post_delete, sender=get_image_model().get_rendition_model())
+def on_rendition_deleted(sender, instance, **kwargs):
+    views.renditions_cache.invalidate(instance.image_id)
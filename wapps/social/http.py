@@ -0,0 +1,174 @@
+'''
+A shared, connection-pooled HTTP client for outbound social fetches.
+
+All fetchers share a single keep-alive session with bounded pools,
+retries with exponential backoff, a per-host circuit breaker
+and per-host latency and error counters.
+'''
+import threading
+import time
+
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class CircuitOpen(requests.RequestException):
+    '''Raised without hitting the network while a host circuit is open'''
+    pass
+
+
+class CircuitBreaker(object):
+    '''
+    A consecutive failures circuit breaker.
+
+    After ``threshold`` consecutive failures, calls are refused during ``timeout`` seconds,
+    then a single trial call is allowed (half-open): it either closes or re-opens the circuit.
+    '''
+    def __init__(self, threshold, timeout):
+        self.threshold = threshold
+        self.timeout = timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.time() - self.opened_at >= self.timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Let a single trial through
+                self.opened_at = time.time()
+            return state != 'open'
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.time()
+
+
+class HostStats(object):
+    '''Latency and error counters for a single host'''
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.refused = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'refused': self.refused,
+            'avg_time': self.total_time / self.requests if self.requests else 0,
+            'max_time': self.max_time,
+        }
+
+
+class Client(object):
+    '''A pooled HTTP client with retries, circuit breakers and statistics'''
+    def __init__(self, pool_size=10, retries=2, backoff=0.3, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(502, 503, 504),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breakers = {}
+        self._stats = defaultdict(HostStats)
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def request(self, method, url, **kwargs):
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        stats = self._stats[host]
+        if not breaker.allow():
+            with self._lock:
+                stats.refused += 1
+            raise CircuitOpen('Circuit open for {0}'.format(host))
+        start = time.time()
+        failed = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            breaker.failure()
+            raise
+        else:
+            failed = response.status_code >= 500
+            if failed:
+                breaker.failure()
+            else:
+                breaker.success()
+            return response
+        finally:
+            elapsed = time.time() - start
+            with self._lock:
+                stats.requests += 1
+                stats.errors += int(failed)
+                stats.total_time += elapsed
+                stats.max_time = max(stats.max_time, elapsed)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def stats(self):
+        '''Per host counters'''
+        with self._lock:
+            return dict((host, stats.as_dict()) for host, stats in self._stats.items())
+
+
+def get_client():
+    '''The process-wide shared client, configured from ``WAPPS_HTTP_*`` settings'''
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Client(
+                    pool_size=settings.WAPPS_HTTP_POOL_SIZE,
+                    retries=settings.WAPPS_HTTP_RETRIES,
+                    backoff=settings.WAPPS_HTTP_BACKOFF,
+                    threshold=settings.WAPPS_HTTP_BREAKER_THRESHOLD,
+                    reset_timeout=settings.WAPPS_HTTP_BREAKER_TIMEOUT,
+                )
+    return _client
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def reset():
+    '''Drop the shared client, ie. after a settings change'''
+    global _client
+    with _client_lock:
+        _client = None
@@ -0,0 +1,134 @@
+'''
+Background refreshed Instagram feeds.
+
+Feeds are stored as snapshots in the shared cache (``WAPPS_CACHE`` alias)
+and templates always read the last good snapshot.
+Stale snapshots are refreshed in the background (stale-while-revalidate)
+and concurrent refreshes are coalesced with a single-flight lock
+shared by all processes.
+'''
+import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import http
+
+log = logging.getLogger(__name__)
+
+#: Snapshot images sizes and their Instagram name
+IMAGE_SIZES = {
+    'thumbnail': 'thumbnail',
+    'low': 'low_resolution',
+    'standard': 'standard_resolution',
+}
+
+_executor = None
+
+
+class FetchError(Exception):
+    '''Raised when the Instagram feed can't be fetched or parsed'''
+    pass
+
+
+def cache():
+    return caches[settings.WAPPS_CACHE]
+
+
+def snapshot_key(user):
+    return 'wapps:instagram:{0}'.format(user)
+
+
+def lock_key(user):
+    return 'wapps:instagram:{0}:lock'.format(user)
+
+
+def fetch(user):
+    '''Fetch and normalize an Instagram user feed'''
+    url = settings.WAPPS_INSTAGRAM_URL.format(user=user)
+    try:
+        response = http.get(url, timeout=settings.WAPPS_INSTAGRAM_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        return [{
+            'id': i['id'],
+            'srcs': dict((size, i['images'][name]['url']) for size, name in IMAGE_SIZES.items()),
+            'text': (i['caption'] or {}).get('text'),
+            'link': i['link'],
+            'likes': i['likes']['count'],
+            'comments': i['comments']['count'],
+            'location': (i['location'] or {}).get('name'),
+            'created_time': int(i['created_time']),
+        } for i in data['items']]
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        raise FetchError(str(e))
+
+
+def acquire(user):
+    '''Acquire the single-flight refresh lock, returns ``False`` if already held'''
+    return cache().add(lock_key(user), True, settings.WAPPS_INSTAGRAM_LOCK_TIMEOUT)
+
+
+def release(user):
+    cache().delete(lock_key(user))
+
+
+def refresh(user, locked=False):
+    '''
+    Fetch a user feed and store it as the new snapshot.
+
+    On failure, the last good snapshot is kept and its next check is delayed.
+    Returns the snapshot or ``None`` if another refresh is already running.
+    '''
+    if not locked and not acquire(user):
+        return None
+    try:
+        snapshot = cache().get(snapshot_key(user))
+        now = time.time()
+        try:
+            items = fetch(user)
+        except FetchError as e:
+            log.warning('Unable to fetch Instagram feed for %s: %s', user, e)
+            if snapshot is None:
+                return None
+            snapshot = dict(snapshot, checked=now)
+        else:
+            snapshot = {'items': items, 'updated': now, 'checked': now}
+        cache().set(snapshot_key(user), snapshot, None)
+        return snapshot
+    finally:
+        release(user)
+
+
+def refresh_in_background(user):
+    '''Schedule a refresh unless one is already running in any process'''
+    global _executor
+    if not acquire(user):
+        return False
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+    _executor.submit(refresh, user, True)
+    return True
+
+
+def is_stale(snapshot):
+    return time.time() - snapshot['checked'] > settings.WAPPS_INSTAGRAM_REFRESH
+
+
+def get_snapshot(user):
+    '''
+    Get the last good snapshot of a user feed.
+
+    A stale snapshot is returned as is and refreshed in the background.
+    A missing snapshot is fetched in the background too and ``None`` is returned
+    so rendering never waits on the upstream.
+    '''
+    snapshot = cache().get(snapshot_key(user))
+    if snapshot is None or is_stale(snapshot):
+        refresh_in_background(user)
+    return snapshot
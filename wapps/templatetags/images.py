@@ -6,7 +6,7 @@ from django.forms.utils import flatatt
 from django.utils.translation import ugettext as _
 from django_jinja import library
 
-from wapps.models import IdentitySettings
+from wapps.identity import get_identity
 
 PLACEHOLDIT_URL = 'https://placehold.it/{width}x{height}/{bg}/{fg}?text={text}'
 
@@ -47,7 +47,7 @@ def placeholder(ctx, value, width, height, bg=None, fg=None, text=None, site=Tru
         request = ctx['request']
         site = request.site
         if site:
-            identity = IdentitySettings.for_site(site)
+            identity = get_identity(site)
             text = getattr(identity, 'name') or site.site_name
     if not text:
         text = '{width}x{height}'.format(**params)
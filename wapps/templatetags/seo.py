@@ -2,10 +2,19 @@ import jinja2
 
 from django_jinja import library
 
+from ..identity import get_identity
 from ..metadata import Metadata
+from ..utils import get_site
 
 
 @library.global_function
 @jinja2.contextfunction
 def page_meta(context, **kwargs):
     return Metadata(context, **kwargs)
+
+
+@library.global_function
+@jinja2.contextfunction
+def site_identity(context):
+    '''The cached identity snapshot of the current site'''
+    return get_identity(get_site(context.get('request')))
@@ -1,23 +1,18 @@
 from datetime import datetime
 
 import jinja2
-import requests
 
 from django.utils.translation import ugettext_lazy as _
 from django_jinja import library
 from jinja2.ext import Extension
-from memoize import memoize
 from urllib.parse import quote_plus
 
 from wapps import social
+from wapps.social import instagram
 from wapps.utils import get_image_url
 
 
-INSTAGRAM_IMAGE_SIZES = {
-    'thumbnail': 'thumbnail',
-    'low': 'low_resolution',
-    'standard': 'standard_resolution',
-}
+INSTAGRAM_IMAGE_SIZES = instagram.IMAGE_SIZES
 INSTAGRAM_SIZES = {
     'thumbnail': 150,
     'low': 320,
@@ -25,8 +20,6 @@ INSTAGRAM_SIZES = {
 }
 INSTAGRAM_DEFAULT_SIZE = 'thumbnail'
 INSTAGRAM_DEFAULT_LENGTH = 10
-INSTAGRAM_CACHE_TIMEOUT = 60 * 5  # Cache for 5 minutes
-INSTAGRAM_FEED_PATTERN = 'https://www.instagram.com/{user}/media/'
 
 
 @library.global_function
@@ -93,30 +86,21 @@ def instagram_error_response(size):
 
 
 @library.global_function
-@memoize(timeout=INSTAGRAM_CACHE_TIMEOUT)
 def instagram_feed(user, size=INSTAGRAM_DEFAULT_SIZE, length=INSTAGRAM_DEFAULT_LENGTH):
+    '''Read the last good snapshot of an Instagram feed'''
     if size not in INSTAGRAM_IMAGE_SIZES:
         raise ValueError('Unknown image size "{0}"'.format(size))
-    url = INSTAGRAM_FEED_PATTERN.format(user=user)
-    try:
-        response = requests.get(url)
-    except requests.RequestException:
-        return instagram_error_response(size)
-    if response.status_code != requests.codes.ok:
-        return instagram_error_response(size)
-    try:
-        data = response.json()
-    except ValueError:
+    snapshot = instagram.get_snapshot(user)
+    if snapshot is None:
         return instagram_error_response(size)
-    image_size = INSTAGRAM_IMAGE_SIZES[size]
 
     return [{
         'id': i['id'],
-        'src': i['images'][image_size]['url'],
-        'text': i['caption']['text'],
+        'src': i['srcs'][size],
+        'text': i['text'],
         'link': i['link'],
-        'likes': i['likes']['count'],
-        'comments': i['comments']['count'],
-        'location': (i['location'] or {}).get('name'),
+        'likes': i['likes'],
+        'comments': i['comments'],
+        'location': i['location'],
         'date': instagram_datetime(i['created_time']),
-    } for i in data['items'][:length]]
+    } for i in snapshot['items'][:length]]
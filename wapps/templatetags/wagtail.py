@@ -6,14 +6,34 @@ from wagtail.contrib.wagtailroutablepage.templatetags.wagtailroutablepage_tags i
     routablepageurl as dj_routablepageurl
 )
 
-from wapps.utils import get_image_url, get_site
+from wapps.breadcrumbs import get_breadcrumbs
+from wapps.menu import get_menu
+from wapps.utils import get_site, image_url_resolver
 
 
 @library.global_function
 def menu():
+    '''The menu pages of all sites, uncached: prefer ``menu_items()``'''
     return Page.objects.live().in_menu().filter(depth__lte=3)
 
 
+@library.global_function
+@jinja2.contextfunction
+def menu_items(context):
+    '''The cached current site menu as ``MenuItem`` tuples'''
+    return get_menu(get_site(context.get('request')))
+
+
+@library.global_function
+@jinja2.contextfunction
+def breadcrumbs(context, page=None):
+    '''The current (or given) page breadcrumbs as ``Crumb`` tuples'''
+    page = page or context.get('page')
+    if not page:
+        return []
+    return get_breadcrumbs(page, get_site(context.get('request')))
+
+
 @library.global_function
 @jinja2.contextfunction
 def is_site_root(context, page):
@@ -24,8 +44,9 @@ def is_site_root(context, page):
 
 
 @library.global_function
-def imageurl(image, specs):
-    return get_image_url(image, specs)
+@jinja2.contextfunction
+def imageurl(context, image, specs):
+    return image_url_resolver(context.get('request')).url(image, specs)
 
 
 @library.global_function
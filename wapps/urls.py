@@ -5,11 +5,12 @@ from django.conf.urls import url
 from wagtail.wagtailimages.views.serve import ServeView
 
 from .api import router
-from .views import image
+from .views import image, instrumentation_stats
 
 urlpatterns = [
     url(r'^api/v1/', router.urls),
     url('^images/(?P<pk>\d+)/(?P<specs>.+)$', image, name='image'),
+    url(r'^instrumentation/$', instrumentation_stats, name='instrumentation-stats'),
     url(r'^images/([^/]*)/(\d*)/([^/]*)/[^/]*$', ServeView.as_view(), name='wagtailimages_serve'),
 ]
 
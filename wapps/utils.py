@@ -1,35 +1,189 @@
 import hashlib
 import time
 
+from collections import Counter
+from functools import lru_cache
+
 from django.conf import settings
-from django.core.urlresolvers import reverse
+from django.core.urlresolvers import get_script_prefix, get_urlconf, reverse
 from django.utils.functional import lazy
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
 from django.utils.safestring import mark_safe
 
 from wagtail.wagtailcore.models import PAGE_MODEL_CLASSES, Page, Site
 
+from .cache import VersionedCache
+from .instrumentation import timed
+
 
 mark_safe_lazy = lazy(mark_safe, str)
 
+#: Placeholders used to reverse the image serve URL once
+_SERVE_URL_PLACEHOLDERS = (
+    ('wappssignature', '{signature}'),
+    ('999999999', '{image_id}'),
+    ('wappsfilterspec', '{filter_spec}'),
+)
+_URL_SAFE_CHARS = RFC3986_SUBDELIMS + '/~:@'
+
+_serve_url_templates = {}
+
+#: Default site shared between processes, invalidated on Site changes
+sites_cache = VersionedCache('sites')
+
+#: Site resolution hits (no query) and misses (default site query)
+site_stats = Counter(hits=0, misses=0)
+
 
 def get_image_model():
     return getattr(settings, 'WAGTAILIMAGES_IMAGE_MODEL', 'wagtailimages.Image')
 
 
+def get_default_site():
+    '''Get the default site, only querying the database on cache miss'''
+    def query():
+        site_stats['misses'] += 1
+        return Site.objects.get(is_default_site=True)
+
+    misses = site_stats['misses']
+    site = sites_cache.get_or_set('default', query)
+    if site_stats['misses'] == misses:
+        site_stats['hits'] += 1
+    return site
+
+
 def get_site(request):
-    return getattr(request, 'site', Site.objects.get(is_default_site=True))
+    '''
+    Get the request site or fallback on the default one.
 
+    The default site is lazily resolved and memoized on the request.
+    '''
+    site = getattr(request, 'site', None) or getattr(request, '_wapps_default_site', None)
+    if site is not None:
+        site_stats['hits'] += 1
+        return site
+    site = get_default_site()
+    if request is not None:
+        request._wapps_default_site = site
+    return site
 
-def get_image_url(image, filter_spec):
+
+def page_url_parts(url_path, root_paths=None):
+    '''
+    Resolve a page ``url_path`` into ``(site_id, root_url, page_path)``
+    like ``Page.get_url_parts()`` but using the cached site root paths map
+    instead of per-page site lookups.
+    '''
+    if root_paths is None:
+        root_paths = Site.get_site_root_paths()
+    for site_id, root_path, root_url in root_paths:
+        if url_path.startswith(root_path):
+            page_path = reverse('wagtail_serve', args=(url_path[len(root_path):],))
+            if not getattr(settings, 'WAGTAIL_APPEND_SLASH', True) and page_path != '/':
+                page_path = page_path.rstrip('/')
+            return site_id, root_url, page_path
+
+
+@lru_cache(maxsize=4096)
+def _signature(image_id, filter_spec, key):
     from wagtail.wagtailimages.views.serve import generate_signature
+    return generate_signature(image_id, filter_spec, key=key).decode()
+
 
-    signature = generate_signature(image.id, filter_spec)
-    url = reverse('wagtailimages_serve', args=(signature, image.id, filter_spec))
+def image_signature(image_id, filter_spec):
+    '''A memoized wagtail image serve signature'''
+    return _signature(image_id, filter_spec, settings.SECRET_KEY)
 
+
+def serve_url_template():
+    '''
+    The ``wagtailimages_serve`` URL as a format string.
+
+    The URL is only reversed once per URLconf and script prefix.
+    '''
+    key = (get_script_prefix(), get_urlconf())
+    template = _serve_url_templates.get(key)
+    if template is None:
+        args = [placeholder for placeholder, _ in _SERVE_URL_PLACEHOLDERS]
+        template = reverse('wagtailimages_serve', args=args).replace('{', '{{').replace('}', '}}')
+        for placeholder, field in _SERVE_URL_PLACEHOLDERS:
+            template = template.replace(placeholder, field)
+        _serve_url_templates[key] = template
+    return template
+
+
+def _image_url(template, image_id, filename, filter_spec):
+    url = template.format(
+        signature=image_signature(image_id, filter_spec),
+        image_id=image_id,
+        filter_spec=urlquote(filter_spec, safe=_URL_SAFE_CHARS),
+    )
     # Append image's original filename to the URL (optional)
-    url += image.file.name[len('original_images/'):]
+    return url + filename[len('original_images/'):]
+
 
-    return url
+@timed('images.url')
+def get_image_url(image, filter_spec):
+    return _image_url(serve_url_template(), image.id, image.file.name, filter_spec)
+
+
+class ImageURLResolver(object):
+    '''
+    Resolve image URLs by batch.
+
+    Every ``(image, filter_spec)`` pair registered with :meth:`add`
+    is built in a single pass on the next lookup, then memoized.
+    '''
+    def __init__(self):
+        self.urls = {}
+        self.pending = {}
+
+    def add(self, image, filter_spec):
+        key = (image.id, filter_spec)
+        if key not in self.urls:
+            self.pending[key] = image.file.name
+
+    def prefetch(self, pairs):
+        for image, filter_spec in pairs:
+            self.add(image, filter_spec)
+        self.resolve()
+
+    def resolve(self):
+        if not self.pending:
+            return
+        template = serve_url_template()
+        self.urls.update(
+            ((image_id, filter_spec), _image_url(template, image_id, filename, filter_spec))
+            for (image_id, filter_spec), filename in self.pending.items()
+        )
+        self.pending.clear()
+
+    def url(self, image, filter_spec):
+        key = (image.id, filter_spec)
+        if key not in self.urls:
+            self.add(image, filter_spec)
+            self.resolve()
+        return self.urls[key]
+
+    __call__ = url
+
+
+def image_url_resolver(request=None):
+    '''Get the request-scoped image URL resolver (or a new one without request)'''
+    if request is None:
+        return ImageURLResolver()
+    resolver = getattr(request, '_wapps_image_urls', None)
+    if resolver is None:
+        resolver = request._wapps_image_urls = ImageURLResolver()
+    return resolver
+
+
+def get_image_urls(pairs, request=None):
+    '''Build the URLs for many ``(image, filter_spec)`` pairs at once'''
+    pairs = list(pairs)
+    resolver = image_url_resolver(request)
+    resolver.prefetch(pairs)
+    return [resolver.url(image, filter_spec) for image, filter_spec in pairs]
 
 
 def hide_page_type(cls):
@@ -1,14 +1,106 @@
-from django.shortcuts import redirect, get_object_or_404
+import hashlib
+import mimetypes
+
+from calendar import timegm
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect, get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 from wagtail.wagtailimages import get_image_model
 from wagtail.wagtailimages.shortcuts import get_rendition_or_not_found
 
+from . import instrumentation
+from .cache import VersionedCache
 
-def image(request, pk, specs):
+#: Renditions lookups scoped by image primary key
+renditions_cache = VersionedCache('renditions')
+
+#: Supported ``WAPPS_IMAGE_SERVE_MODE`` values
+SERVE_MODES = ('redirect', 'direct', 'sendfile', 'accel')
+
+
+def rendition_key(specs):
+    '''Specs come from the URL: hash them into a bounded, backend-safe key'''
+    return hashlib.md5(specs.encode('utf-8')).hexdigest()
+
+
+def rendition_storage():
+    return get_image_model().get_rendition_model()._meta.get_field('file').storage
+
+
+@instrumentation.timed('renditions.lookup')
+def lookup_rendition(pk, specs):
     '''
-    Request an image given some specs and redirects to it
+    Resolve an image rendition into a cacheable dict.
+
+    Raises ``Http404`` if the image does not exist.
+    Missing source files resolve to a placeholder without ``name``.
     '''
     image = get_object_or_404(get_image_model(), pk=pk)
     rendition = get_rendition_or_not_found(image, specs)
-    return redirect(rendition.url)
+    if not rendition.pk:
+        return {'url': rendition.url, 'name': None}
+    name = rendition.file.name
+    try:
+        modified = rendition_storage().get_modified_time(name)
+    except (NotImplementedError, OSError):
+        modified = image.created_at
+    return {
+        'url': rendition.url,
+        'name': name,
+        'etag': '"{0}"'.format(hashlib.md5('{0}:{1}'.format(rendition.pk, name).encode('utf-8')).hexdigest()),
+        'last_modified': timegm(modified.utctimetuple()),
+    }
+
+
+def image(request, pk, specs):
+    '''
+    Request an image given some specs and serves it.
+
+    Depending on ``WAPPS_IMAGE_SERVE_MODE``, the rendition is served by a redirect (default),
+    directly, or delegated to the front server using X-Sendfile or X-Accel-Redirect.
+    '''
+    mode = settings.WAPPS_IMAGE_SERVE_MODE
+    if mode not in SERVE_MODES:
+        raise ImproperlyConfigured('Unknown WAPPS_IMAGE_SERVE_MODE "{0}", expected one of {1}'.format(
+            mode, ', '.join(SERVE_MODES)
+        ))
+    pk = int(pk)
+    key = rendition_key(specs)
+    rendition = renditions_cache.get(key, scope=pk)
+    if rendition is None:
+        rendition = lookup_rendition(pk, specs)
+        if rendition['name']:
+            # Placeholders are not cached so restored source files are picked up
+            renditions_cache.set(key, rendition, scope=pk)
+    if mode == 'redirect' or not rendition['name']:
+        return redirect(rendition['url'])
+
+    response = get_conditional_response(request, etag=rendition['etag'], last_modified=rendition['last_modified'])
+    if response is None:
+        content_type = mimetypes.guess_type(rendition['name'])[0] or 'application/octet-stream'
+        if mode == 'direct':
+            response = FileResponse(rendition_storage().open(rendition['name'], 'rb'), content_type=content_type)
+        else:
+            response = HttpResponse(content_type=content_type)
+            if mode == 'sendfile':
+                response['X-Sendfile'] = rendition_storage().path(rendition['name'])
+            else:
+                response['X-Accel-Redirect'] = rendition['url']
+    response['ETag'] = rendition['etag']
+    response['Last-Modified'] = http_date(rendition['last_modified'])
+    patch_cache_control(response, public=True, max_age=settings.WAPPS_IMAGE_MAX_AGE)
+    return response
+
+
+def instrumentation_stats(request):
+    '''The in-process instrumentation stats, for staff members only'''
+    if not settings.WAPPS_INSTRUMENTATION:
+        raise Http404('Instrumentation is disabled')
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return JsonResponse(instrumentation.get_stats())